@@ -1,147 +1,262 @@
 # app/cache.py
 
-import time
 import threading
-from sys import getsizeof
+from collections import OrderedDict
+from contextlib import contextmanager
+from time import monotonic as _mono
+
+from . import config
 
 """
 Módulo que implementa um cache em LRU (Least Recently Used) em memória,
-thread-safe, com TTL e limites de tamanho (itens e bytes).
+thread-safe, com TTL e limites de tamanho (itens e bytes). A política de
+remoção é o S3-FIFO, resistente a varreduras (scans) de itens acessados uma vez.
 """
 
+# Fração dos limites reservada à fila de entrada (small) do S3-FIFO
+_SMALL_QUEUE_RATIO = 0.1
+
+# Teto do contador de acessos por item
+_MAX_FREQ = 3
+
 class _CacheNode:
-  """Nó interno para a lista duplamente encadeada que gerencia a ordem LRU."""
-  def __init__(self, key, value, expiration_time):
+  """Entrada interna do cache: valor, expiração, tamanho e contador de acessos."""
+  # Sem __dict__ por instância: menos memória e acesso a atributos por offset fixo
+  __slots__ = ('key', 'value', 'expiration_time', 'size_bytes', 'freq', 'in_main')
+
+  def __init__(self, key, value, expiration_time, size_bytes, in_main=False):
     self.key = key
-    # self.value agora será um dicionário: {'content': ..., 'etag': ...}
+    # Para o servidor, self.value é um CachedFile (conteúdo, ETag e cabeçalhos)
     self.value = value
     self.expiration_time = expiration_time
-    if isinstance(self.value, dict):
-      content_bytes = self.value.get('content', b'')
-      self.size_bytes = len(content_bytes) if isinstance(content_bytes, bytes) else getsizeof(content_bytes)
-    else:
-      # Para nos nós sentinela (head/tail), o valor é None e o tamanho é 0.
-      self.size_bytes = 0
-      
-    self.prev = None
-    self.next = None
+    self.size_bytes = size_bytes
+
+    # Acessos desde a entrada (até _MAX_FREQ); gasto pela varredura de remoção
+    self.freq = 0
+    # Em qual fila do S3-FIFO o item está: principal (True) ou de entrada (False)
+    self.in_main = in_main
+
+class _RWLock:
+  """
+  Lock de leitura/escrita baseado em threading.Condition.
+
+  Vários leitores podem segurar o lock ao mesmo tempo; um escritor tem acesso
+  exclusivo. Escritores em espera bloqueiam novos leitores para evitar starvation.
+  """
+  __slots__ = ('_cond', '_readers', '_writer', '_writers_waiting')
+
+  def __init__(self):
+    # Nenhum método reentra no lock: um Lock simples evita o custo extra do RLock,
+    # que é o lock padrão de threading.Condition()
+    self._cond = threading.Condition(threading.Lock())
+    self._readers = 0
+    self._writer = False
+    self._writers_waiting = 0
+
+  @contextmanager
+  def read(self):
+    with self._cond:
+      while self._writer or self._writers_waiting:
+        self._cond.wait()
+      self._readers += 1
+    try:
+      yield
+    finally:
+      with self._cond:
+        self._readers -= 1
+        if self._readers == 0:
+          self._cond.notify_all()
+
+  @contextmanager
+  def write(self):
+    with self._cond:
+      self._writers_waiting += 1
+      while self._writer or self._readers:
+        self._cond.wait()
+      self._writers_waiting -= 1
+      self._writer = True
+    try:
+      yield
+    finally:
+      with self._cond:
+        self._writer = False
+        self._cond.notify_all()
 
 class LRUCache:
   """
-  Uma classe que implementa um cache LRU thread-safe.
-  
-  Combina um dicionário para acesso O(1) e uma lista duplamente encadeada para manter a ordem de uso e realizar remoções em O(1).
-  Suporta expiração por TTL, expiração preguiçosa e políticas de remoção
-  baseadas no número de itens e no tamanho total em bytes.
+  Uma classe que implementa um cache thread-safe com remoção S3-FIFO.
+
+  Itens novos entram em uma fila FIFO pequena (small, ~10% dos limites). Sob
+  pressão, a cabeça da small é promovida para a fila principal (main) se foi
+  acessada desde a entrada; caso contrário, é removida e sua chave vai para a
+  fila fantasma (ghost). Uma chave reinserida enquanto está na ghost entra
+  direto na main. Na main, itens acessados ganham uma nova volta na fila (como
+  no CLOCK) e os demais são removidos. Assim, uma varredura de itens acessados
+  uma única vez passa só pela small e não expulsa os itens populares.
+
+  Um get apenas incrementa o contador de acessos do item, sem reordenar nada,
+  e por isso roda sem lock; só as escritas usam o lock de leitura/escrita.
+  Suporta expiração por TTL, expiração preguiçosa e limites de número de itens
+  e de tamanho total em bytes.
   """
+  # Atributos em offsets fixos: acesso mais rápido em get/set e sem __dict__
+  __slots__ = (
+    '_cache', '_small', '_main', '_ghost', '_rwlock', '_max_items', '_max_bytes',
+    '_small_max_items', '_small_max_bytes', '_small_bytes',
+    '_hits', '_misses', '_current_bytes'
+  )
 
   def __init__(self, max_items, max_bytes):
+    # Um limite em MB passado por engano (ex.: 5) faria o cache remover tudo a cada set
+    if max_items < 1 or max_bytes < 1:
+      raise ValueError("max_items e max_bytes devem ser positivos (max_bytes é em bytes)")
+
+    # Índice chave -> nó, e as filas do S3-FIFO (início = próximo candidato)
     self._cache = {}
-    self._lock = threading.Lock()
+    self._small = OrderedDict()
+    self._main = OrderedDict()
+    self._ghost = OrderedDict()  # Só chaves removidas recentemente da small
+    self._rwlock = _RWLock()
 
     # Limites para política de remoção
     self._max_items = max_items
     self._max_bytes = max_bytes
+    self._small_max_items = max_items * _SMALL_QUEUE_RATIO
+    self._small_max_bytes = max_bytes * _SMALL_QUEUE_RATIO
 
-    # Nós sentinela (dummy) para simplificar a lógica da lista
-    self._head = _CacheNode(None, None, None)  # Nó mais recentemente usado
-    self._tail = _CacheNode(None, None, None)  # Nó menos recentemente usado
-    self._head.next = self._tail
-    self._tail.prev = self._head
-
-    # Estatísticas
+    # Estatísticas. Os contadores são atualizados sem lock, como node.freq: uma
+    # corrida entre dois gets só perde uma contagem, o que basta para métricas.
     self._hits = 0
     self._misses = 0
     self._current_bytes = 0
+    self._small_bytes = 0
 
-  # --- Métodos Privados para Gerenciar a Lista Encadeada ---
+  # --- Métodos Públicos do Cache ---
 
-  def _remove_node(self, node):
-    """Remove um nó da lista duplamente encadeada."""
-    prev_node = node.prev
-    next_node = node.next
-    prev_node.next = next_node
-    next_node.prev = prev_node
+  def get(self, key):
+    """
+    Recupera um item do cache.
 
-  def _add_to_front(self, node):
-    """Adiciona um nó logo após o head (mais recentemente usado)."""
-    node.next = self._head.next
-    node.prev = self._head
-    self._head.next.prev = node
-    self._head.next = node
+    Um hit não usa lock algum, como o bit de referência do CLOCK: dict.get é
+    atômico sob o GIL, e os contadores de acessos e de hits/misses são escritas
+    de atributo sem lock (uma corrida entre leitores só perde uma contagem). Um nó
+    removido por um escritor concorrente ainda tem um valor válido, só deixa
+    de estar no cache. O lock de escrita só é usado para remover itens expirados.
+    """
+    node = self._cache.get(key)
+    if node is None:
+      self._misses += 1
+      return None  # Cache miss
 
-  # --- Métodos Públicos do Cache ---
+    if _mono() > node.expiration_time:
+      with self._rwlock.write():
+        # Outro escritor pode ter substituído o nó enquanto esperávamos
+        if self._cache.get(key) is node:
+          self._remove(node)
+      self._misses += 1
+      return None  # Cache miss por expiração
 
-  def get(self, key):
-    """Recupera um item do cache, atualizando sua posição como mais recente."""
-    with self._lock:
-      node = self._cache.get(key)
-      
-      if node is None:
-        self._misses += 1
-        return None  # Cache miss
-      
-      # Expiração preguiçosa
-      if time.time() > node.expiration_time:
-        self._remove_node(node)
-        del self._cache[node.key]
-        self._current_bytes -= node.size_bytes
-        self._misses += 1
-        return None # Cache miss por expiração
-      
-      # Move o nó para a frente (mais recentemente usado)
-      self._remove_node(node)
-      self._add_to_front(node)
-
-      self._hits += 1
-      return node.value # Cache hit
+    if node.freq < _MAX_FREQ:
+      node.freq += 1
+    self._hits += 1
+    return node.value # Cache hit
     
-  def set(self, key, value, ttl_seconds):
-    """Adiciona ou atualiza um item no cache, aplicando a política LRU e os limites."""
-    with self._lock:
-      # Se o item já existe, removemos a versão antiga
-      if key in self._cache:
-        old_node = self._cache[key]
-        self._current_bytes -= old_node.size_bytes
-        self._remove_node(old_node)
+  def set(self, key, value, ttl_seconds, size_bytes=None):
+    """
+    Adiciona ou atualiza um item no cache, aplicando a política S3-FIFO e os limites.
+
+    Sem size_bytes, o valor deve ser bytes ou um dicionário com os bytes em
+    'content', e o tamanho contabilizado é o comprimento desses bytes.
+    Valores de outros tipos devem informar size_bytes.
+    """
+    if size_bytes is None:
+      content = value['content'] if isinstance(value, dict) else value
+      size_bytes = len(content)
+
+    with self._rwlock.write():
+      # Se o item já existe, a nova versão fica na mesma fila da antiga
+      old_node = self._cache.get(key)
+      if old_node is not None:
+        in_main = old_node.in_main
+        self._remove(old_node)
+      else:
+        # Chave vista há pouco (ghost): já provou ser reutilizada, vai direto para a main
+        in_main = key in self._ghost
+        if in_main:
+          del self._ghost[key]
 
       # Cria um novo nó
-      expiration_time = time.time() + ttl_seconds
-      new_node = _CacheNode(key, value, expiration_time)
+      # Relógio monotônico: imune a ajustes do relógio de parede (NTP, etc.)
+      expiration_time = _mono() + ttl_seconds
+      new_node = _CacheNode(key, value, expiration_time, size_bytes, in_main)
 
-      # Adiciona ao cache e à frente da lista
       self._cache[key] = new_node
-      self._add_to_front(new_node)
-      self._current_bytes += new_node.size_bytes
+      if in_main:
+        self._main[key] = new_node
+      else:
+        self._small[key] = new_node
+        self._small_bytes += size_bytes
+      self._current_bytes += size_bytes
 
-      # Aplica a política de remoção LRU
+      # Aplica a política de remoção
       self._enforce_limits()
 
+  def _remove(self, node):
+    """Retira um nó do índice e da sua fila, atualizando os contadores de bytes."""
+    del self._cache[node.key]
+    if node.in_main:
+      del self._main[node.key]
+    else:
+      del self._small[node.key]
+      self._small_bytes -= node.size_bytes
+    self._current_bytes -= node.size_bytes
+
   def _enforce_limits(self):
-    """Remove itens antigos até que os limites sejam respeitados."""
-    while (len(self._cache) > self._max_items) or (self._current_bytes > self._max_bytes):
-      # Remove o nó menos recentemente usado (tail.prev)
-      lru_node = self._tail.prev
-      if lru_node == self._head:
-        break  # Cache está vazio, nada a remover
-
-      # Remove da lista, do dicionário e atualiza o tamanho
-      self._remove_node(lru_node)
-      del self._cache[lru_node.key]
-      self._current_bytes -= lru_node.size_bytes
+    """
+    Remove itens até que os limites sejam respeitados.
+
+    Enquanto a small estiver acima da sua fração dos limites (ou a main
+    estiver vazia), a varredura consome a small; senão, a main. Cada passo
+    promove, dá outra volta ou remove um item, e os contadores de acesso só
+    diminuem, então o laço sempre termina.
+    """
+    cache = self._cache
+    small = self._small
+    main = self._main
+    while cache and (len(cache) > self._max_items or self._current_bytes > self._max_bytes):
+      if small and (not main or len(small) > self._small_max_items
+                    or self._small_bytes > self._small_max_bytes):
+        key, node = small.popitem(last=False)
+        self._small_bytes -= node.size_bytes
+        if node.freq:
+          # Acessado desde a entrada: promovido para a main, com o contador zerado
+          node.freq = 0
+          node.in_main = True
+          main[key] = node
+          continue
+        # Acessado uma única vez: removido, mas lembrado na ghost
+        self._ghost[key] = None
+        if len(self._ghost) > self._max_items:
+          self._ghost.popitem(last=False)
+      else:
+        key, node = main.popitem(last=False)
+        if node.freq:
+          node.freq -= 1
+          main[key] = node  # Outra volta na fila
+          continue
+      del cache[key]
+      self._current_bytes -= node.size_bytes
 
   def invalidate(self, key):
     """Remove um item específico do cache."""
-    with self._lock:
-      if key in self._cache:
-        node_to_remove = self._cache[key]
-        self._remove_node(node_to_remove)
-        del self._cache[key]
-        self._current_bytes -= node_to_remove.size_bytes
+    with self._rwlock.write():
+      node_to_remove = self._cache.get(key)
+      if node_to_remove is not None:
+        self._remove(node_to_remove)
 
   def stats(self):
     """Retorna estatísticas do cache."""
-    with self._lock:
+    with self._rwlock.read():
       return {
         "hits": self._hits,
         "misses": self._misses,
@@ -151,8 +266,67 @@ class LRUCache:
         "max_bytes": self._max_bytes
       }
 
-# --- Instância Global do Cache ---
-from .config import MAX_CACHE_ITEMS, MAX_CACHE_BYTES
+class ShardedLRUCache:
+  """
+  Cache LRU particionado em N sub-caches independentes (striped locking).
+
+  Cada chave pertence a um único shard, escolhido por hash(key) & (N - 1), e
+  cada shard tem seu próprio lock: escritas em chaves de shards diferentes não
+  bloqueiam umas às outras. Os limites são divididos igualmente entre os shards.
+  """
+  __slots__ = ('_mask', '_shards')
+
+  def __init__(self, max_items, max_bytes, num_shards):
+    if num_shards < 1 or num_shards & (num_shards - 1):
+      raise ValueError("num_shards deve ser uma potência de 2")
+
+    self._mask = num_shards - 1
+    self._shards = [
+      LRUCache(max(1, max_items // num_shards), max_bytes // num_shards)
+      for _ in range(num_shards)
+    ]
+
+  def _shard_for(self, key):
+    """Retorna o shard responsável pela chave."""
+    return self._shards[hash(key) & self._mask]
+
+  def get(self, key):
+    """Recupera um item do shard da chave."""
+    return self._shard_for(key).get(key)
 
-# A instância agora é criada com os limites definidos em config.py
-cache_instance = LRUCache(MAX_CACHE_ITEMS, MAX_CACHE_BYTES)
\ No newline at end of file
+  def set(self, key, value, ttl_seconds, size_bytes=None):
+    """Adiciona ou atualiza um item no shard da chave."""
+    self._shard_for(key).set(key, value, ttl_seconds, size_bytes)
+
+  def invalidate(self, key):
+    """Remove um item específico do shard da chave."""
+    self._shard_for(key).invalidate(key)
+
+  def stats(self):
+    """Retorna as estatísticas somadas de todos os shards."""
+    totals = {}
+    for shard in self._shards:
+      for name, value in shard.stats().items():
+        totals[name] = totals.get(name, 0) + value
+    totals["shards"] = len(self._shards)
+    return totals
+
+def create_cache():
+  """
+  Cria o cache da aplicação com os limites definidos em config.py.
+
+  O número de shards é reduzido (mantendo potência de 2) até que cada shard
+  comporte o maior arquivo cacheável, isto é, o limiar de streaming.
+  """
+  largest_cacheable = config.STREAMING_THRESHOLD_BYTES
+  num_shards = config.CACHE_SHARDS
+  while num_shards > 1 and config.MAX_CACHE_BYTES // num_shards < largest_cacheable:
+    num_shards //= 2
+
+  if num_shards == 1:
+    return LRUCache(config.MAX_CACHE_ITEMS, config.MAX_CACHE_BYTES)
+  return ShardedLRUCache(config.MAX_CACHE_ITEMS, config.MAX_CACHE_BYTES, num_shards)
+
+# --- Instância Global do Cache ---
+# Único ponto de criação: o servidor sempre importa esta instância.
+cache_instance = create_cache()
\ No newline at end of file
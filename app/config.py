@@ -4,24 +4,58 @@
 Arquivo de configuração central para o servidor HTTP.
 """
 
+import os
+
+MB = 1024 * 1024                # Um megabyte (MiB) em bytes. Todo limite de tamanho abaixo é em bytes.
+
 # Configurações de Rede, Desempenho, Arquivos...
 HOST = "0.0.0.0"                # Escuta em todas as interfaces de rede
 PORT = 8080                     # Porta padrão
 MAX_CONNECTIONS = 100           # Número máximo de conexões enfileiradas no socket
+# Threads do pool que atendem conexões: 4 por CPU (carga de E/S), com um mínimo de 32,
+# já que cada conexão keep-alive ocupa uma thread enquanto está aberta
+MAX_WORKERS = max(32, (os.cpu_count() or 1) * 4)
+MAX_QUEUED_CONNECTIONS = 64     # Conexões aceitas esperando um worker antes de responder 503
 KEEP_ALIVE_TIMEOUT = 5          # Segundos que uma conexão keep-alive aguarda por nova requisição
+MAX_REQUEST_BYTES = 4096        # Tamanho máximo do cabeçalho de uma requisição (bytes)
+RECV_BUFFER_BYTES = 16384       # Buffer de leitura (recv_into) reutilizado por cada thread do pool
 WWW_ROOT = "www"                # Diretório raiz para servir arquivos estáticos
 LOG_FILE = "logs/server.log"    # Arquivo para registrar os logs de acesso
 STREAMING_THRESHOLD_MB = 2      # Arquivos maiores que este valor (em MB) serão transmitidos em chunks
+STREAMING_THRESHOLD_BYTES = STREAMING_THRESHOLD_MB * MB  # O mesmo limiar, já convertido para bytes
 CHUNK_SIZE_BYTES = 8192         # Tamanho de cada chunk de streaming (8 KB)
+TCP_NOTSENT_LOWAT_BYTES = 64 * 1024  # Bytes não enviados que o kernel aceita por conexão
+SOCKET_SNDBUF_BYTES = 4 * MB    # Buffer de envio de cada conexão (limitado por net.core.wmem_max)
+SOCKET_RCVBUF_BYTES = 256 * 1024  # Buffer de recepção de cada conexão (limitado por net.core.rmem_max)
+ZEROCOPY_ENABLED = False        # Envia cache HITs com MSG_ZEROCOPY (apenas Linux >= 4.14)
+ZEROCOPY_MIN_BYTES = 16 * 1024  # Corpos menores que isso não compensam a notificação do zerocopy
 
 # Configurações de Cache
 ENABLE_CACHE = True            # Habilita ou desabilita o cache em memória
+# Mapeia arquivos em memória (mmap) em vez de copiá-los para o cache. Desligado por padrão:
+# se um arquivo mapeado for truncado no disco durante um envio, o processo recebe SIGBUS.
+CACHE_MMAP_ENABLED = False
+MMAP_MIN_BYTES = 64 * 1024     # Arquivos menores são lidos normalmente (mmap custa syscalls extras)
 DEFAULT_TTL_SECONDS = 10         # Tempo padrão de vida do cache (em segundos)
+COMPRESSION_ENABLED = True       # Guarda variantes br/gzip de arquivos de texto no cache
+COMPRESS_MIN_BYTES = 1024        # Arquivos menores não são comprimidos
+GZIP_LEVEL = 6                   # Nível do gzip (1 = rápido, 9 = menor)
+BROTLI_QUALITY = 4               # Qualidade do brotli, se o pacote estiver instalado (0 a 11)
+# ETag: "simple" (tamanho e mtime em hexadecimal, sem hash) ou "hash" (BLAKE2b dos mesmos
+# campos, para não expor tamanho e data do arquivo). Calculada uma vez por versão do arquivo.
+ETAG_METHOD = "simple"
+# Cache-Control das respostas de arquivos: HTML usa "no-cache" (o cliente sempre revalida,
+# o que custa só um 304 com a ETag); os demais são reusados sem revalidar por este tempo
+STATIC_MAX_AGE_SECONDS = 3600
+HOT_PATHS = ("/index.html", "/favicon.ico", "/style.css")  # Caminhos com resposta pronta
+HOT_REVALIDATE_SECONDS = 0.5     # Intervalo máximo sem stat para os HOT_PATHS
+DEBUG_CACHE = False              # Loga (em DEBUG) o resultado de cada consulta ao cache: HIT, MISS ou STALE
 
 # Novos limites para Política de Eviction (LRU)
 # O cache irá remover itens antigos se qualquer um dos limites for excedido.
 MAX_CACHE_ITEMS = 100          # Número máximo de itens na cache
-MAX_CACHE_BYTES = 5 * 1024 * 1024         # Tamanho máximo da cache (5MB)
+MAX_CACHE_BYTES = 5 * MB       # Tamanho máximo da cache, em bytes (5MB)
+CACHE_SHARDS = 4               # Partições do cache, cada uma com seu lock (potência de 2)
 
 # Configurações de Métricas
 METRICS_CSV_FILE = "metrics/requests.csv"  # Arquivo CSV para armazenar métricas de requisições
\ No newline at end of file
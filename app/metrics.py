@@ -1,51 +1,164 @@
 # app/metrics.py
 
-import csv
+import atexit
 import os
+import queue
 import threading
-from datetime import datetime, UTC
+import time
+from urllib.parse import quote
 
 from . import config
 
+# Marcadores de controle enviados pela fila para a thread escritora
+_FLUSH = object()
+_STOP = object()
+
+# Formato fixo da linha do CSV: os campos de texto são escapados em log_request,
+# então nenhum deles contém vírgulas, aspas ou quebras de linha.
+_ROW_FMT = "{},{},{},{},{},{:.2f},{},{}\n".format
+_PATH_SAFE_CHARS = "/?&=%:@+;"
+
+# (segundo, prefixo ISO-8601 desse segundo), trocado de uma vez só por atribuição
+_ts_cache = (None, "")
+
+def _iso_timestamp(ts):
+  """
+  Formata um timestamp epoch como ISO-8601 em UTC com microssegundos.
+
+  O prefixo "AAAA-MM-DDTHH:MM:SS" é formatado uma vez por segundo e reutilizado;
+  por requisição resta apenas a parte fracionária.
+  """
+  global _ts_cache
+  sec, micros = divmod(round(ts * 1_000_000), 1_000_000)
+  cached_sec, prefix = _ts_cache
+  if sec != cached_sec:
+    prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(sec))
+    _ts_cache = (sec, prefix)
+  return f"{prefix}.{micros:06d}+00:00"
+
+def _format_row(record):
+  """Formata um registro enfileirado por log_request como uma linha do CSV (em bytes)."""
+  ts, client_ip, method, path, status, response_time_ms, bytes_sent, cache_status = record
+  # Método e caminho vêm do cliente: escapamos para manter o CSV íntegro
+  return _ROW_FMT(
+    _iso_timestamp(ts), client_ip, quote(method, safe=""), quote(path, safe=_PATH_SAFE_CHARS),
+    status, response_time_ms, bytes_sent, cache_status
+  ).encode('utf-8')
+
 class MetricsLogger:
   """
   Uma classe thread-safe para registrar métricas de requisições HTTP em um arquivo CSV.
+
+  As threads de requisição apenas enfileiram os campos crus (uma tupla); uma única
+  thread escritora formata as linhas, mantém o descritor do arquivo aberto e grava
+  em lotes, fora do caminho crítico da resposta.
   """
+  __slots__ = (
+    'filepath', '_flush_interval', '_batch_size', '_queue', '_header',
+    '_fd', '_batch', '_thread', '_dropped', '_dropped_reported'
+  )
 
-  def __init__(self, filepath):
+  def __init__(self, filepath, flush_interval=0.1, batch_size=256, max_pending=10000):
     """
     Inicializa o logger de métricas.
     
     Args:
       filepath (str): Caminho do arquivo CSV onde as métricas serão armazenadas.
+      flush_interval (float): Segundos de inatividade após os quais o lote pendente é gravado.
+      batch_size (int): Número de linhas acumuladas por gravação.
+      max_pending (int): Tamanho máximo da fila de linhas pendentes.
     """
     self.filepath = filepath
-    self._lock = threading.Lock()
+    self._flush_interval = flush_interval
+    self._batch_size = batch_size
+    self._queue = queue.Queue(maxsize=max_pending)
     self._header = [
       "timestamp", "client_ip", "method", "path", "status",
       "response_time_ms", "bytes_sent", "cache_status"
     ]
 
-    # Garante que o diretório do arquivo existam com o cabeçalho correto
-    self._initialize_file()
-
-  def _initialize_file(self):
-    """Cria o diretório e o arquivo CSV com cabeçalho, se não existirem."""
-    with self._lock:
-      # Garante que o diretório de métricas exista antes de checar o arquivo.
-      os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
-      
-      # Escreve o cabeçalho se o arquivo for novo
-      if not os.path.exists(self.filepath):
-        with open(self.filepath, 'w', newline='') as f:
-          writer = csv.writer(f)
-          writer.writerow(self._header)
+    # Descritor de longa duração, usado apenas pela thread escritora.
+    # Com O_APPEND cada os.write vai para o fim do arquivo sem lock em espaço de usuário.
+    self._fd = self._open_file()
+    self._batch = []
+
+    # Registros descartados com a fila cheia. Contados sem lock pelas threads de
+    # requisição (uma corrida só perde uma contagem) e relatados pela thread escritora
+    self._dropped = 0
+    self._dropped_reported = 0
+
+    self._thread = threading.Thread(target=self._writer_loop, name="metrics-writer", daemon=True)
+    self._thread.start()
+
+  def _open_file(self):
+    """Cria o diretório, abre o CSV em modo append e escreve o cabeçalho se ele estiver vazio."""
+    # Garante que o diretório de métricas exista antes de abrir o arquivo.
+    os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
+
+    fd = os.open(self.filepath, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    # Escreve o cabeçalho se o arquivo for novo (um fstat no lugar de exists + open)
+    if os.fstat(fd).st_size == 0:
+      os.write(fd, (",".join(self._header) + "\n").encode('utf-8'))
+    return fd
+
+  def _writer_loop(self):
+    """Consome a fila, formata os registros e grava no CSV em lotes, com um único os.write por lote."""
+    while True:
+      try:
+        # Sem lote pendente, dorme até chegar um registro; com lote, espera no máximo
+        # flush_interval antes de gravá-lo
+        record = self._queue.get(timeout=self._flush_interval if self._batch else None)
+      except queue.Empty:
+        # Fila ociosa: grava o que estiver acumulado
+        self._write_batch()
+        continue
+
+      try:
+        if record is _STOP:
+          self._write_batch()
+          os.close(self._fd)
+          return
+        if record is _FLUSH:
+          self._write_batch()
+          continue
+
+        try:
+          self._batch.append(_format_row(record))
+        except Exception as e:
+          # Um registro inválido é descartado sem derrubar a thread escritora: sem ela,
+          # a fila enche e todas as métricas seguintes se perdem
+          print(f"ERRO: Registro de métrica inválido descartado ({e!r}): {record!r}")
+          continue
+        if len(self._batch) >= self._batch_size:
+          self._write_batch()
+      finally:
+        self._queue.task_done()
+
+  def _write_batch(self):
+    """Grava as linhas acumuladas no arquivo e relata os registros descartados desde a última gravação."""
+    dropped = self._dropped
+    if dropped != self._dropped_reported:
+      print(f"ERRO: Fila de métricas cheia; {dropped - self._dropped_reported} registro(s) descartado(s).")
+      self._dropped_reported = dropped
+    if not self._batch:
+      return
+    data = memoryview(b"".join(self._batch))
+    self._batch.clear()
+    try:
+      while data:
+        written = os.write(self._fd, data)
+        data = data[written:]
+    except Exception as e:
+      # O lote é perdido, mas a thread escritora continua atendendo a fila
+      print(f"ERRO: Falha ao escrever no arquivo de métricas: {e}")
 
   def log_request(self, client_ip, method, path, status, response_time_ms, bytes_sent, cache_status):
     """
     Registra uma métrica de requisição HTTP no arquivo CSV.
 
     Todos os argumentos devem ser fornecidos para garantir a integridade dos dados.
+    A gravação é assíncrona: os campos e o horário são apenas enfileirados, e a
+    formatação da linha acontece na thread escritora.
     
     Args:
       client_ip (str): Endereço IP do cliente.
@@ -56,21 +169,26 @@ class MetricsLogger:
       bytes_sent (int): Número de bytes enviados na resposta.
       cache_status (str): Status do cache ("HIT", "MISS", "BYPASS").
     """
-    timestamp = datetime.now(UTC).isoformat()
+    record = (time.time(), client_ip, method, path, status, response_time_ms, bytes_sent, cache_status)
+    try:
+      self._queue.put_nowait(record)
+    except queue.Full:
+      # Nada de I/O aqui: o servidor já está saturado. A thread escritora relata o total
+      self._dropped += 1
 
-    row = [
-      timestamp, client_ip, method, path, status,
-      f"{response_time_ms:.2f}", bytes_sent, cache_status
-    ]
+  def flush(self):
+    """Bloqueia até que todas as linhas enfileiradas estejam gravadas no arquivo."""
+    if not self._thread.is_alive():
+      return
+    self._queue.put(_FLUSH)
+    self._queue.join()
 
-    with self._lock:
-      try:
-        with open(self.filepath, 'a', newline='') as f:
-          writer = csv.writer(f)
-          writer.writerow(row)
-      except IOError as e:
-        # Em um sistema real, isso aqui deveria ser logado apropriadamente
-        print(f"ERRO: Falha ao escrever no arquivo de métricas: {e}")
+  def close(self):
+    """Grava as linhas pendentes, fecha o arquivo e encerra a thread escritora."""
+    if self._thread.is_alive():
+      self._queue.put(_STOP)
+      self._thread.join()
 
 # --- Instância global do logger de métricas ---
-metrics_logger = MetricsLogger(filepath=config.METRICS_CSV_FILE)
\ No newline at end of file
+metrics_logger = MetricsLogger(filepath=config.METRICS_CSV_FILE)
+atexit.register(metrics_logger.close)
@@ -2,14 +2,31 @@
 
 import socket
 import threading
+from concurrent.futures import ThreadPoolExecutor
 import os
 import sys
 import logging
 import argparse
+import atexit
+import queue
+import gzip
 import hashlib
-from email.utils import formatdate
-from datetime import datetime, timezone
-from time import time
+import mimetypes
+import mmap
+import struct
+import multiprocessing
+from stat import S_ISREG
+from logging.handlers import QueueHandler, QueueListener
+from email.utils import formatdate, parsedate_to_datetime
+from functools import lru_cache, partial
+from contextlib import contextmanager
+from time import time, monotonic
+
+# brotli é opcional: sem ele, só a variante gzip é gerada
+try:
+  import brotli
+except ImportError:
+  brotli = None
 
 # Importa as configurações
 from . import config
@@ -22,14 +39,26 @@ from .metrics import metrics_logger
 # Garante que o diretório de logs existe
 os.makedirs(os.path.dirname(config.LOG_FILE), exist_ok=True)
 
+# As threads de requisição apenas enfileiram o registro (QueueHandler); uma única
+# thread (QueueListener) formata e grava no arquivo e no console, fora do caminho crítico
+_log_queue = queue.SimpleQueue()
+_log_listener = QueueListener(
+  _log_queue,
+  logging.FileHandler(config.LOG_FILE),
+  logging.StreamHandler(sys.stdout), # Também exibe logs no console
+  respect_handler_level=True
+)
+for _handler in _log_listener.handlers:
+  _handler.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
+
 logging.basicConfig(
   level=logging.INFO,
-  format='%(asctime)s - %(message)s',
-  handlers=[
-    logging.FileHandler(config.LOG_FILE),
-    logging.StreamHandler(sys.stdout) # Também exibe logs no console
-  ]
+  format='%(message)s',  # O prefixo com a data é aplicado pela thread do listener
+  handlers=[QueueHandler(_log_queue)]
 )
+_log_listener.start()
+# Grava os registros ainda na fila ao encerrar o processo
+atexit.register(_log_listener.stop)
 
 # --- Mapeamento de Tipos MIME ---
 MIME_TYPES = {
@@ -42,59 +71,937 @@ MIME_TYPES = {
   '.gif': 'image/gif',
   '.ico': 'image/x-icon',
   ".txt": "text/plain",
+  '.json': 'application/json',
+  '.svg': 'image/svg+xml',
+}
+
+# Mesmo mapeamento, indexado pela extensão sem o ponto
+_MIME_BY_EXT = {ext[1:]: mime for ext, mime in MIME_TYPES.items()}
+
+# Tipos não-"text/*" que também são texto e comprimem bem
+_COMPRESSIBLE_TYPES = frozenset({'application/javascript', 'application/json', 'image/svg+xml'})
+
+# Ordem de preferência das variantes comprimidas
+_ENCODING_PREFERENCE = ('br', 'gzip')
+
+# Caminho da URL -> _HotResponse (ver lookup_hot_response)
+_hot_responses = {}
+
+# Nome do cabeçalho como chega (bytes) -> nome em minúsculas (str), para os cabeçalhos comuns
+_HEADER_NAMES = {
+  spelling.encode('latin-1'): spelling.lower()
+  for name in (
+    'Host', 'User-Agent', 'Accept', 'Accept-Encoding', 'Accept-Language', 'Connection',
+    'If-None-Match', 'If-Modified-Since', 'Cache-Control', 'Referer', 'Cookie', 'Upgrade-Insecure-Requests',
+    'Range', 'If-Range'
+  )
+  for spelling in (name, name.lower())
 }
 
+# Os únicos cabeçalhos de requisição que o servidor consulta (ver parse_request)
+REQUEST_HEADERS_USED = frozenset({'if-none-match', 'if-modified-since', 'accept-encoding', 'range', 'if-range'})
+
+# Caminho do arquivo -> _FileMeta (ver file_etag)
+_file_meta = {}
+_file_meta_lock = threading.Lock()
+_FILE_META_MAX_ENTRIES = 4096
+
+STATUS_MESSAGES = {
+  200: "OK", 206: "Partial Content", 304: "Not Modified", 400: "Bad Request", 403: "Forbidden",
+  404: "Not Found", 405: "Method Not Allowed", 416: "Range Not Satisfiable",
+  500: "Internal Server Error", 503: "Service Unavailable"
+}
+
+SERVER_NAME = "PythonSimpleServer/1.0"
+# Linhas de status já codificadas para os códigos conhecidos (ver build_status_line)
+STATUS_LINES = {
+  code: f"HTTP/1.1 {code} {text}\r\n".encode('ascii') for code, text in STATUS_MESSAGES.items()
+}
+STATUS_LINE_200 = STATUS_LINES[200]
+STATUS_LINE_206 = STATUS_LINES[206]
+STATUS_LINE_304 = STATUS_LINES[304]
+
+# (segundo, linha "Date: ...\r\n" desse segundo), trocado de uma vez só por atribuição
+_date_cache = (None, b"")
+
+# socket.sendmsg não existe no Windows (ver sendmsg_all)
+_HAS_SENDMSG = hasattr(socket.socket, "sendmsg")
+# Corpos abaixo disso (~MSS de um enlace Ethernet) saem no mesmo segmento que os cabeçalhos
+_SINGLE_SEGMENT_BYTES = 1400
+
+# TCP_QUICKACK, TCP_CORK e TCP_NOTSENT_LOWAT só existem no Linux (os dois últimos também em outros Unix)
+_TCP_QUICKACK = getattr(socket, "TCP_QUICKACK", None)
+_TCP_CORK = getattr(socket, "TCP_CORK", None)
+_TCP_NOTSENT_LOWAT = getattr(socket, "TCP_NOTSENT_LOWAT", None)
+
+# madvise só existe em sistemas Unix com suporte (Python 3.8+)
+_MADV_WILLNEED = getattr(mmap, "MADV_WILLNEED", None)
+
+# posix_fadvise só existe em sistemas POSIX (não no Windows nem no macOS)
+_FADV_SEQUENTIAL = getattr(os, "POSIX_FADV_SEQUENTIAL", None)
+
+# Constantes do MSG_ZEROCOPY (Linux), ainda não expostas pelo módulo socket
+_ZEROCOPY_SUPPORTED = sys.platform.startswith("linux")
+_SO_ZEROCOPY = getattr(socket, "SO_ZEROCOPY", 60)
+_MSG_ZEROCOPY = getattr(socket, "MSG_ZEROCOPY", 0x4000000)
+_SOCK_EXTENDED_ERR = struct.Struct("=IBBBBII")
+_SO_EE_ORIGIN_ZEROCOPY = 5
+_SO_EE_CODE_ZEROCOPY_COPIED = 1
+
+@lru_cache(maxsize=4096)
 def get_mime_type(filepath):
   """
   Retorna o tipo MIME com base na extensão do arquivo.
+
+  Memorizado por caminho: HITs do cache já levam o Content-Type pronto nos
+  cabeçalhos, e os caminhos de MISS e de streaming consultam esta tabela.
+  """
+  # rpartition no lugar de os.path.splitext: sem tupla intermediária nem normalização
+  _, dot, ext = filepath.rpartition('.')
+  if not dot or '/' in ext:
+    return 'application/octet-stream'  # Sem extensão
+  return _MIME_BY_EXT.get(ext.lower(), 'application/octet-stream')
+
+def register_mime_types(root):
+  """
+  Completa a tabela de tipos MIME com as extensões presentes em `root`.
+
+  Roda uma vez, na inicialização: extensões fora de MIME_TYPES (ex.: .webp, .pdf)
+  são consultadas no módulo mimetypes e entram na tabela, e nenhuma requisição
+  chama o mimetypes. Extensões que ele não conhece continuam como octet-stream.
   """
-  _, ext = os.path.splitext(filepath)
-  return MIME_TYPES.get(ext.lower(), 'application/octet-stream')
+  for _, _, filenames in os.walk(root):
+    for filename in filenames:
+      _, dot, ext = filename.rpartition('.')
+      ext = ext.lower()
+      if not dot or ext in _MIME_BY_EXT:
+        continue
+      mime, _ = mimetypes.guess_type(filename, strict=False)
+      if mime is not None:
+        _MIME_BY_EXT[ext] = mime
+  # Respostas memorizadas antes do registro podem ter caído em octet-stream
+  get_mime_type.cache_clear()
 
 # -- Novas Funções Utilitárias ---
 
-def generate_etag(filepath):
+def generate_etag(stat):
   """
-  Gera um ETag fraca baseada no tamanho e data de modificação do arquivo.
+  Gera um ETag fraca baseada no tamanho e data de modificação do arquivo (resultado de os.stat).
   """
-  stat = os.stat(filepath)
-  # Formato "tamanho-timestap_modificacao"
-  etag_str = f"{stat.st_size}-{stat.st_mtime}"
-  # Usamos SHA1 para criar um hash curto e opaco, como é comum
-  return hashlib.sha1(etag_str.encode('utf-8')).hexdigest()
+  # Formato W/"tamanho-mtime_ns" em hexadecimal (como o nginx): já é curta e opaca,
+  # sem precisar de hash. A comparação com o If-None-Match é por igualdade de string.
+  etag = f"{stat.st_size:x}-{stat.st_mtime_ns:x}"
+  if config.ETAG_METHOD == "hash":
+    # Opcional: esconde tamanho e data do arquivo atrás de um hash. BLAKE2b com
+    # digest curto é mais barato que SHA-1 em entradas pequenas como esta
+    etag = hashlib.blake2b(etag.encode('ascii'), digest_size=10).hexdigest()
+  return f'W/"{etag}"'
+
+class _FileMeta:
+  """Metadados memorizados de uma versão de arquivo, identificada por (mtime_ns, tamanho)."""
+  __slots__ = ('mtime_ns', 'size', 'etag', 'etag_method')
+
+  def __init__(self, mtime_ns, size, etag, etag_method):
+    self.mtime_ns = mtime_ns
+    self.size = size
+    self.etag = etag
+    self.etag_method = etag_method
 
+def file_etag(filepath, file_stat):
+  """
+  Retorna a ETag do arquivo, calculada uma vez por versão (mtime_ns e tamanho).
+
+  Enquanto o arquivo não muda, requisições seguintes só comparam dois inteiros
+  com o stat recém-feito, sem formatar a ETag de novo.
+  """
+  meta = _file_meta.get(filepath)
+  if (meta is None or meta.mtime_ns != file_stat.st_mtime_ns or meta.size != file_stat.st_size
+      or meta.etag_method != config.ETAG_METHOD):
+    meta = _FileMeta(file_stat.st_mtime_ns, file_stat.st_size, generate_etag(file_stat), config.ETAG_METHOD)
+    # Leituras não usam lock; só a inserção (e a limpeza ao atingir o limite) é serializada
+    with _file_meta_lock:
+      if len(_file_meta) >= _FILE_META_MAX_ENTRIES:
+        _file_meta.clear()
+      _file_meta[filepath] = meta
+  return meta.etag
+
+@lru_cache(maxsize=1024)
+def format_http_date(timestamp):
+  """
+  Formata um timestamp como data HTTP (RFC 7231), com resolução de segundos.
+
+  Os mesmos valores (Last-Modified de arquivos populares) se repetem a cada
+  resposta, então o resultado é memorizado.
+  """
+  return formatdate(timeval=int(timestamp), localtime=False, usegmt=True)
+
+@lru_cache(maxsize=1024)
 def parse_http_date(date_str):
   """
   Converte uma data em formato HTTP para timestamp. Simples, para este projeto.
+
+  Clientes reenviam o mesmo If-Modified-Since, então o resultado é memorizado.
   """
-  from email.utils import parsedate_to_datetime
   try:
     return parsedate_to_datetime(date_str).timestamp()
   except (TypeError, ValueError):
     return None
   
-def parse_headers(request_str):
+def parse_request(head, wanted=None):
   """
-  Analisa os cabeçalhos HTTP da requisição e retorna um dicionário.
+  Analisa o cabeçalho de uma requisição HTTP, recebido em bytes (sem o CRLF final).
+
+  Só a linha de requisição e os valores dos cabeçalhos são decodificados, sem
+  converter o buffer inteiro para str antes. Com `wanted` (conjunto de nomes em
+  minúsculas), só esses cabeçalhos entram no dicionário; os demais (User-Agent,
+  Cookie...) são pulados sem decodificar o valor.
+
+  Returns:
+    tuple: (método, caminho, dicionário de cabeçalhos com chaves em minúsculas).
+    Uma linha de requisição malformada resulta em ("INVALID", "INVALID", {}).
   """
+  # Linha de requisição "MÉTODO CAMINHO VERSÃO": localiza os dois espaços e o
+  # fim da linha com find, sem criar listas intermediárias
+  eol = head.find(b'\r\n')
+  if eol < 0:
+    eol = len(head)
+  sp1 = head.find(b' ', 0, eol)
+  sp2 = head.find(b' ', sp1 + 1, eol)
+  if sp1 <= 0 or sp2 <= sp1 + 1 or sp2 + 1 >= eol or head.find(b' ', sp2 + 1, eol) >= 0:
+    return "INVALID", "INVALID", {}
+  method = head[:sp1].decode('latin-1')
+  path = head[sp1 + 1:sp2].decode('utf-8', errors='ignore')
+
+  # bytes é imutável e hashable: os nomes dos cabeçalhos podem ser buscados em _HEADER_NAMES
+  if type(head) is not bytes:
+    head = bytes(head)
+
+  # Percorre as linhas com find, sem montar a lista de linhas; os nomes conhecidos
+  # saem prontos de _HEADER_NAMES, sem strip/lower/decode por requisição
   headers = {}
-  lines = request_str.split('\r\n')[1:]  # Ignora a primeira linha (GET / HTTP/1.1)
-  for line in lines:
-    if not line:
+  pos = eol + 2
+  size = len(head)
+  while pos < size:
+    end = head.find(b'\r\n', pos)
+    if end < 0:
+      end = size
+    if end == pos:
       break # Fim dos cabeçalhos
-    key, value = line.split(':', 1)
-    headers[key.strip().lower()] = value.strip()
-  return headers
+    colon = head.find(b':', pos, end)
+    if colon >= 0:  # Linhas sem ':' são ignoradas
+      raw_name = head[pos:colon]
+      name = _HEADER_NAMES.get(raw_name)
+      if name is None:
+        name = raw_name.strip().lower().decode('latin-1')
+      if wanted is None or name in wanted:
+        headers[name] = head[colon + 1:end].strip().decode('latin-1')
+    pos = end + 2
+  return method, path, headers
+
+def resolve_path(path):
+  """
+  Converte o caminho da URL no caminho absoluto do arquivo dentro de WWW_ROOT.
+  Retorna None se o caminho tentar escapar do diretório permitido.
+
+  A validação é feita sobre os componentes do caminho, sem syscalls: qualquer
+  componente '..' é recusado, então o resultado fica sempre dentro de WWW_ROOT.
+  """
+  return _resolve_in(config.WWW_ROOT, path)
+
+@lru_cache(maxsize=4096)
+def _resolve_in(root, path):
+  """
+  Resolve `path` dentro de `root` (o valor de WWW_ROOT). Um site estático tem
+  poucas URLs, então o resultado é memorizado por (raiz, caminho): um acerto é só
+  uma busca no dicionário, e o abspath da raiz só é calculado em um miss.
+  """
+  # Segurança: Garante que o arquivo está dentro do diretório permitido
+  if '..' in path.split('/'):
+    return None
+  # O caminho é a chave do cache: internado, a comparação no dicionário termina no teste de identidade
+  return sys.intern(os.path.normpath(f"{os.path.abspath(root)}/{path}"))
+
+def stat_file(filepath):
+  """
+  Faz um único os.stat no arquivo. Retorna None se ele não existir ou não for um arquivo regular.
+
+  O resultado substitui as chamadas separadas a exists, isfile, getmtime e getsize.
+  """
+  try:
+    file_stat = os.stat(filepath)
+  except (FileNotFoundError, NotADirectoryError, ValueError):
+    # ValueError: caminho com byte nulo
+    return None
+  return file_stat if S_ISREG(file_stat.st_mode) else None
+
+def etag_matches(if_none_match, etag):
+  """
+  Compara o If-None-Match com a ETag atual usando a comparação fraca da RFC 7232:
+  aceita "*", uma lista separada por vírgulas e ignora o prefixo W/ dos dois lados.
+  """
+  # Caso comum (o cliente devolve a ETag exatamente como recebeu): sem split
+  if if_none_match == etag:
+    return True
+  if if_none_match.strip() == '*':
+    return True
+  opaque = etag[2:] if etag.startswith('W/') else etag
+  for candidate in if_none_match.split(','):
+    candidate = candidate.strip()
+    if candidate.startswith('W/'):
+      candidate = candidate[2:]
+    if candidate == opaque:
+      return True
+  return False
+
+def is_not_modified(request_headers, etag, last_modified_time):
+  """
+  Avalia os cabeçalhos condicionais da requisição.
+  Retorna True se a cópia do cliente ainda é válida (resposta 304).
+  """
+  # Checa o If-None-Match (ETag) - tem prioridade
+  if_none_match = request_headers.get('if-none-match')
+  if if_none_match:
+    return etag_matches(if_none_match, etag)
+
+  # Checa o If-Modified-Since (Data de Modificação)
+  if_modified_since_str = request_headers.get('if-modified-since')
+  if if_modified_since_str:
+    if_modified_since_time = parse_http_date(if_modified_since_str)
+    # Se o arquivo não foi modificado desde a data enviada pelo cliente
+    return bool(if_modified_since_time) and int(last_modified_time) <= if_modified_since_time
+
+  return False
+
+# Resultado de parse_byte_range quando o intervalo começa depois do fim do arquivo (416)
+RANGE_NOT_SATISFIABLE = "unsatisfiable"
+
+def if_range_matches(if_range, etag, last_modified_time):
+  """
+  Avalia o If-Range com a comparação forte exigida pela RFC 9110 (seção 13.1.5).
+
+  Uma ETag fraca (W/) nunca satisfaz o If-Range: ela não garante bytes idênticos
+  (as variantes gzip e identity compartilham a mesma ETag). A forma de data só
+  vale se o Last-Modified for pelo menos 1 segundo mais antigo que o Date da
+  resposta; senão o arquivo pode ter mudado no mesmo segundo.
+  """
+  if if_range.startswith(('W/', '"')):
+    # Forma de ETag: só uma ETag forte idêntica à atual satisfaz
+    if if_range.startswith('W/') or etag.startswith('W/'):
+      return False
+    return if_range == etag
+  modified = int(last_modified_time)
+  return if_range == format_http_date(modified) and modified <= int(time()) - 1
+
+def parse_byte_range(request_headers, etag, last_modified_time, file_size):
+  """
+  Interpreta o Range (um único intervalo de bytes) e o If-Range da requisição.
+
+  Returns:
+    None para ignorar o Range e enviar o arquivo inteiro (sem Range, If-Range que
+    não passa na comparação forte, vários intervalos ou cabeçalho malformado); a tupla
+    (início, fim), com o fim incluído, para um 206; ou RANGE_NOT_SATISFIABLE.
+  """
+  range_header = request_headers.get('range')
+  if not range_header:
+    return None
+  # If-Range: só retoma o download se a cópia do cliente é a versão atual
+  if_range = request_headers.get('if-range')
+  if if_range and not if_range_matches(if_range, etag, last_modified_time):
+    return None
+
+  # Aceita "bytes=início-fim", "bytes=início-" e "bytes=-N"; vírgulas (vários
+  # intervalos), sinais e espaços fazem o Range ser ignorado
+  unit, _, spec = range_header.partition('=')
+  first, dash, last = spec.strip().partition('-')
+  if unit.strip().lower() != 'bytes' or not dash or not (first or last):
+    return None
+  if any(part and not (part.isascii() and part.isdigit()) for part in (first, last)):
+    return None
+
+  if not first:
+    # bytes=-N: os últimos N bytes
+    suffix = int(last)
+    if suffix == 0 or file_size == 0:
+      return RANGE_NOT_SATISFIABLE
+    return max(file_size - suffix, 0), file_size - 1
+
+  start = int(first)
+  if last and int(last) < start:
+    return None
+  if start >= file_size:
+    return RANGE_NOT_SATISFIABLE
+  return start, (min(int(last), file_size - 1) if last else file_size - 1)
+
+class CachedFile:
+  """
+  Entrada do cache de arquivos: as variantes do corpo (identity e, para texto,
+  br/gzip), a ETag e os cabeçalhos pré-codificados de um HIT para cada variante
+  e de uma resposta 304.
+  """
+  # Atributos em offsets fixos: sem o dicionário por entrada e sem busca por chave no HIT
+  __slots__ = ('etag', 'bodies', 'headers', 'not_modified')
+
+  def __init__(self, etag, bodies, headers, not_modified=None):
+    self.etag = etag
+    self.bodies = bodies    # codificação -> corpo
+    self.headers = headers  # codificação -> cabeçalhos após o Date
+    self.not_modified = not_modified  # Cabeçalhos após o Date de um 304 (ou None)
+
+  def select(self, accept_encoding):
+    """Retorna (cabeçalhos, corpo) da melhor variante aceita pelo cliente."""
+    encoding = choose_encoding(accept_encoding, self.bodies)
+    return self.headers[encoding], self.bodies[encoding]
+
+def is_compressible(filepath):
+  """Indica se o tipo do arquivo é texto e vale a pena comprimir."""
+  mime_type = get_mime_type(filepath)
+  return mime_type.startswith('text/') or mime_type in _COMPRESSIBLE_TYPES
+
+def encode_variants(filepath, content):
+  """
+  Gera as variantes do corpo guardadas no cache: sempre 'identity' e, para
+  arquivos de texto, 'br' (se o pacote brotli estiver instalado) e 'gzip'.
+
+  A compressão acontece uma vez por inserção no cache, não por requisição.
+  Variantes que não ficam menores que o original são descartadas.
+  """
+  bodies = {'identity': content}
+  if (not config.COMPRESSION_ENABLED or len(content) < config.COMPRESS_MIN_BYTES
+      or not is_compressible(filepath)):
+    return bodies
+
+  if brotli is not None:
+    compressed = brotli.compress(bytes(content), quality=config.BROTLI_QUALITY)
+    if len(compressed) < len(content):
+      bodies['br'] = compressed
+  compressed = gzip.compress(content, compresslevel=config.GZIP_LEVEL)
+  if len(compressed) < len(content):
+    bodies['gzip'] = compressed
+  return bodies
+
+@lru_cache(maxsize=256)
+def _accepted_encodings(accept_encoding):
+  """
+  Conjuntos (aceitas, recusadas) das codificações de um cabeçalho Accept-Encoding.
+  Recusadas são as com q=0, em qualquer posição entre os parâmetros.
+  Os navegadores enviam sempre o mesmo valor, então o resultado é memorizado.
+  """
+  accepted = set()
+  refused = set()
+  for part in accept_encoding.split(','):
+    name, *params = part.split(';')
+    name = name.strip().lower()
+    if not name:
+      continue
+    target = accepted
+    for param in params:
+      key, _, value = param.partition('=')
+      if key.strip().lower() == 'q':
+        try:
+          if float(value) == 0:
+            target = refused  # q=0: o cliente recusa esta codificação
+        except ValueError:
+          pass  # q malformado: ignorado
+    target.add(name)
+  return frozenset(accepted), frozenset(refused)
+
+def choose_encoding(accept_encoding, bodies):
+  """
+  Escolhe a variante a enviar: br, depois gzip, se existirem e forem aceitas; senão identity.
+  Uma recusa explícita (q=0) vale mais que o curinga "*".
+  """
+  if len(bodies) == 1 or not accept_encoding:
+    return 'identity'
+  accepted, refused = _accepted_encodings(accept_encoding)
+  for encoding in _ENCODING_PREFERENCE:
+    if encoding in bodies and (encoding in accepted or ('*' in accepted and encoding not in refused)):
+      return encoding
+  return 'identity'
+
+def build_variant_headers(filepath, bodies, cache_status, etag, last_modified_time):
+  """Constrói os cabeçalhos após o Date de cada variante do corpo."""
+  vary = len(bodies) > 1
+  return {
+    encoding: build_file_header_tail(
+      filepath, len(body), cache_status, etag, last_modified_time, encoding, vary
+    )
+    for encoding, body in bodies.items()
+  }
+
+def load_file_response(filepath, etag, last_modified_time, accept_encoding="", file_size=None):
+  """
+  Obtém o corpo de um arquivo pequeno, seus cabeçalhos e o status do cache.
+
+  Primeiro, tenta obter o conteúdo do cache. Se falhar (miss ou entrada
+  obsoleta), lê do disco e armazena no cache para futuras requisições.
+  A entrada do cache guarda também os cabeçalhos já codificados (tudo
+  exceto a linha de status e o Date), então um HIT não monta cabeçalho algum.
+  A variante enviada (identity, br ou gzip) segue o Accept-Encoding do cliente.
+  `file_size` é o st_size do stat já feito pelo chamador (evita um novo fstat na leitura).
+
+  Returns:
+    tuple: (cabeçalhos em bytes após o Date, corpo, cache_status,
+            entrada do cache ou None se o cache estiver desabilitado)
+  """
+  cached_data, cache_status = lookup_cached_file(filepath, etag)
+  if cached_data is not None:
+    header_tail, body = cached_data.select(accept_encoding)
+    return header_tail, body, "HIT", cached_data
+  return read_file_response(filepath, etag, last_modified_time, accept_encoding, file_size, cache_status)
+
+def lookup_cached_file(filepath, etag):
+  """
+  Etapa 1 de load_file_response: consulta o cache, sem E/S de disco.
+
+  Returns:
+    tuple: (CachedFile válido ou None, cache_status: "HIT", "MISS", "STALE" ou "DISABLED")
+  """
+  if not config.ENABLE_CACHE:
+    return None, "DISABLED"
+
+  # Os logs por consulta ficam atrás de config.DEBUG_CACHE: desligado, o custo é
+  # um teste de atributo, sem chamada ao logging em cada requisição
+  cached_data = cache_instance.get(filepath)
+  if not cached_data:
+    if config.DEBUG_CACHE:
+      logging.debug("Cache MISS para o arquivo: %s", filepath)
+    return None, "MISS"
+
+  # Cache HIT! Agora, vamos REVALIDAR com a ETag já calculada.
+  if cached_data.etag == etag:
+    # ETag bate! O cache é válido.
+    if config.DEBUG_CACHE:
+      logging.debug("Cache HIT para o arquivo: %s (Válido)", filepath)
+    return cached_data, "HIT"
+
+  # ETag diferente! O cache está OBSOLETO (stale). Não invalidamos aqui: o set da
+  # nova versão (read_file_response) substitui a entrada sob um único lock de escrita
+  # e a mantém na mesma fila do S3-FIFO, em vez de devolver um arquivo popular à small
+  if config.DEBUG_CACHE:
+    logging.debug("Cache STALE para o arquivo: %s", filepath)
+  return None, "STALE"
+
+def read_file_response(filepath, etag, last_modified_time, accept_encoding, file_size, cache_status):
+  """
+  Etapas 2 e 3 de load_file_response: lê o arquivo do disco, gera as variantes
+  comprimidas e guarda a entrada no cache. Bloqueia (E/S de disco e compressão).
+
+  Returns:
+    tuple: o mesmo de load_file_response.
+  """
+  # --- Etapa 2: Ler do Disco (se cache miss ou stale) ---
+  # Sem buffer (FileIO): o conteúdo vai direto para o bytes final, em uma única leitura
+  with open(filepath, 'rb', buffering=0) as f:
+    file_content = read_file_content(f, file_size)
+  bodies = encode_variants(filepath, file_content)
+
+  # --- Etapa 3: Armazenar no Cache (após ler do disco) ---
+  data_to_cache = None
+  if config.ENABLE_CACHE:
+    # Guardamos as variantes, a ETag atual e os cabeçalhos que um HIT vai enviar
+    cache_headers = build_variant_headers(filepath, bodies, "HIT", etag, last_modified_time)
+    not_modified = _not_modified_header_tail(etag, int(last_modified_time), cache_control_for(filepath))
+    data_to_cache = CachedFile(etag, bodies, cache_headers, not_modified)
+    size_bytes = sum(map(len, bodies.values())) + sum(map(len, cache_headers.values()))
+    cache_instance.set(filepath, data_to_cache, config.DEFAULT_TTL_SECONDS, size_bytes=size_bytes)
+
+  encoding = choose_encoding(accept_encoding, bodies)
+  body = bodies[encoding]
+  headers = build_file_header_tail(
+    filepath, len(body), cache_status, etag, last_modified_time, encoding, len(bodies) > 1
+  )
+  return headers, body, cache_status, data_to_cache
+
+class _HotResponse:
+  """Entrada do cache de um dos HOT_PATHS, válida até valid_until (relógio monotônico)."""
+  __slots__ = ('root', 'cached', 'valid_until')
+
+  def __init__(self, root, cached, valid_until):
+    self.root = root
+    self.cached = cached
+    self.valid_until = valid_until
+
+def lookup_hot_response(path, request_headers):
+  """
+  Retorna a entrada pronta (CachedFile) de um caminho popular, ou None para seguir o caminho normal.
+
+  A entrada vale por HOT_REVALIDATE_SECONDS; depois disso a próxima requisição
+  passa pelo stat e pelo cache e a renova, então uma mudança no arquivo aparece
+  em no máximo esse intervalo.
+  """
+  # Requisições condicionais seguem o caminho normal (ou lookup_hot_not_modified),
+  # assim como as de intervalo (Range)
+  if 'if-none-match' in request_headers or 'if-modified-since' in request_headers or 'range' in request_headers:
+    return None
+  return _hot_entry(path)
+
+def lookup_hot_not_modified(path, request_headers):
+  """
+  Para um caminho popular cujo If-None-Match bate com a ETag da entrada pronta,
+  retorna os cabeçalhos após o Date da resposta 304; senão, None.
+
+  A validade é a mesma de lookup_hot_response: sem stat, sem cache e sem montar cabeçalhos.
+  """
+  if_none_match = request_headers.get('if-none-match')
+  if not if_none_match:
+    return None
+  cached = _hot_entry(path)
+  if cached is None or cached.not_modified is None or if_none_match != cached.etag:
+    return None
+  return cached.not_modified
+
+def _hot_entry(path):
+  """Retorna o CachedFile de um caminho popular, se a entrada ainda for válida."""
+  entry = _hot_responses.get(path)
+  if entry is None or entry.root != config.WWW_ROOT or monotonic() > entry.valid_until:
+    return None
+  return entry.cached
+
+def remember_hot_response(path, cached):
+  """Guarda a entrada do cache de um dos HOT_PATHS para o caminho rápido."""
+  if cached is None or path not in config.HOT_PATHS:
+    return
+  _hot_responses[path] = _HotResponse(
+    config.WWW_ROOT, cached, monotonic() + config.HOT_REVALIDATE_SECONDS
+  )
+
+def read_file_content(f, size=None):
+  """
+  Lê o conteúdo do arquivo aberto para o cache.
+
+  Com `size` (tamanho vindo do stat do chamador), a leitura não precisa de
+  outro fstat para descobrir o tamanho do arquivo.
+
+  Com config.CACHE_MMAP_ENABLED, arquivos a partir de MMAP_MIN_BYTES são mapeados
+  em memória (somente leitura) em vez de copiados para um novo bytes: as threads
+  enviam direto das páginas do page cache. O retorno é uma memoryview do mmap;
+  o mapeamento é desfeito quando a última referência (cache ou envio em curso)
+  desaparece, então a remoção do cache nunca invalida um envio em andamento.
+
+  O mapeamento tem exatamente `size` bytes, o tamanho usado na ETag e no
+  Content-Length: se o arquivo mudou de tamanho desde o stat, o mmap falha
+  (arquivo menor) ou ignora o excesso (arquivo maior), e a leitura comum assume.
+  """
+  if config.CACHE_MMAP_ENABLED:
+    if size is None:
+      size = os.fstat(f.fileno()).st_size
+    if size >= config.MMAP_MIN_BYTES:
+      try:
+        mapped = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+      except (ValueError, OSError):
+        return f.read(size)
+      # Pede ao kernel para carregar as páginas já: o primeiro envio não para em page faults
+      if _MADV_WILLNEED is not None:
+        mapped.madvise(_MADV_WILLNEED)
+      return memoryview(mapped)
+  return f.read() if size is None else f.read(size)
+
+def date_header_line():
+  """
+  Retorna a linha "Date: ...\r\n" em bytes.
+
+  A data HTTP tem resolução de segundos, então é formatada uma vez por segundo
+  e reutilizada pelas demais respostas. A troca é feita pela própria requisição
+  que encontra o segundo novo (sem thread de atualização): a linha nunca fica
+  atrasada e o custo por requisição é um time() e uma comparação de inteiros.
+  """
+  global _date_cache
+  now = int(time())
+  cached_sec, line = _date_cache
+  if now != cached_sec:
+    line = f"Date: {formatdate(timeval=now, localtime=False, usegmt=True)}\r\n".encode('ascii')
+    _date_cache = (now, line)
+  return line
+
+def build_headers(status_code, extra_headers):
+  """
+  Constrói a linha de status e os cabeçalhos HTTP (em bytes).
+  """
+  return build_status_line(status_code) + date_header_line() + build_header_lines(extra_headers)
+
+def build_status_line(status_code):
+  """
+  Constrói a linha de status HTTP (em bytes).
+  """
+  status_line = STATUS_LINES.get(status_code)
+  if status_line is not None:
+    return status_line
+  status_text = STATUS_MESSAGES.get(status_code, "Unknown Status")
+  return f"HTTP/1.1 {status_code} {status_text}\r\n".encode('utf-8')
+
+def build_header_lines(extra_headers):
+  """
+  Constrói (em bytes) os cabeçalhos que vêm depois do Date, incluindo a linha em branco final.
+  """
+  headers = {"Server": SERVER_NAME}
+  headers.update(extra_headers)
+
+  headers_str = "".join(f"{k}: {v}\r\n" for k, v in headers.items())
+  return f"{headers_str}\r\n".encode('utf-8')
+
+def cache_control_for(filepath):
+  """
+  Valor do Cache-Control de um arquivo: páginas HTML sempre revalidam (no-cache),
+  os demais arquivos estáticos podem ser reusados por STATIC_MAX_AGE_SECONDS.
+  """
+  if get_mime_type(filepath).startswith("text/html"):
+    return "no-cache"
+  return f"public, max-age={config.STATIC_MAX_AGE_SECONDS}"
+
+def build_file_header_tail(filepath, content_length, cache_status, etag, last_modified_time,
+                           content_encoding='identity', vary=False, content_range=None):
+  """
+  Constrói os cabeçalhos de uma resposta 200 OK com o conteúdo de um arquivo,
+  sem a linha de status e sem o Date (ver STATUS_LINE_200 e date_header_line).
+
+  `vary` indica que o arquivo tem variantes comprimidas (Vary: Accept-Encoding).
+  `content_range` ("bytes início-fim/tamanho") é usado nas respostas 206.
+  """
+  headers = {
+    "Content-Type": get_mime_type(filepath),
+    "Content-Length": content_length,
+    "Connection": "keep-alive",
+    "X-Cache-Status": cache_status,
+    "ETag": etag,
+    "Last-Modified": format_http_date(last_modified_time),
+    "Cache-Control": cache_control_for(filepath),
+    "Accept-Ranges": "bytes"
+  }
+  if content_encoding != 'identity':
+    headers["Content-Encoding"] = content_encoding
+  if vary:
+    headers["Vary"] = "Accept-Encoding"
+  if content_range is not None:
+    headers["Content-Range"] = content_range
+  return build_header_lines(headers)
+
+def build_file_headers(filepath, content_length, cache_status, etag, last_modified_time):
+  """
+  Constrói os cabeçalhos (em bytes) de uma resposta 200 OK com o conteúdo de um arquivo.
+  """
+  tail = build_file_header_tail(filepath, content_length, cache_status, etag, last_modified_time)
+  return STATUS_LINE_200 + date_header_line() + tail
+
+def build_partial_headers(filepath, byte_range, file_size, cache_status, etag, last_modified_time):
+  """
+  Constrói os cabeçalhos (em bytes) de uma resposta 206 Partial Content com o
+  intervalo (início, fim) do arquivo.
+  """
+  start, end = byte_range
+  tail = build_file_header_tail(
+    filepath, end - start + 1, cache_status, etag, last_modified_time,
+    content_range=f"bytes {start}-{end}/{file_size}"
+  )
+  return STATUS_LINE_206 + date_header_line() + tail
+
+def build_not_modified_response(filepath, etag, last_modified_time):
+  """
+  Constrói uma resposta 304 Not Modified (em bytes) com os cabeçalhos apropriados.
+
+  Como nos HITs de 200, só o Date é montado por resposta; o resto dos
+  cabeçalhos é codificado uma vez por versão do arquivo (ETag).
+  """
+  return b"".join(not_modified_response_parts(filepath, etag, last_modified_time))
+
+def not_modified_response_parts(filepath, etag, last_modified_time):
+  """Partes de uma resposta 304 (linha de status, Date, cabeçalhos), para envio vetorizado."""
+  tail = _not_modified_header_tail(etag, int(last_modified_time), cache_control_for(filepath))
+  return STATUS_LINE_304, date_header_line(), tail
+
+@lru_cache(maxsize=1024)
+def _not_modified_header_tail(etag, last_modified_time, cache_control):
+  """Cabeçalhos após o Date de uma resposta 304, memorizados por (ETag, Last-Modified, Cache-Control)."""
+  # O 304 repete o Cache-Control do 200 (RFC 7232): o cliente renova o prazo da cópia
+  return build_header_lines({
+    "ETag": etag,
+    "Last-Modified": format_http_date(last_modified_time),
+    "Cache-Control": cache_control,
+  })
+
+def _render_error_response(status_code, extra_headers=None):
+  """
+  Monta as partes fixas de uma resposta de erro: linha de status, cabeçalhos
+  após o Date junto com o corpo, e o tamanho do corpo.
+  """
+  status_text = STATUS_MESSAGES.get(status_code, "Unknown Error")
+  body = f"<h1>{status_code} {status_text}</h1>".encode('utf-8')
+
+  headers = build_header_lines({
+    "Content-Type": "text/html; charset=utf-8",
+    "Content-Length": len(body),
+    # Fecha a conexão após um erro, exceto os que não deixam a conexão em estado duvidoso
+    "Connection": "keep-alive" if status_code in KEEP_ALIVE_ERRORS else "close",
+    **(extra_headers or {})
+  })
+
+  return build_status_line(status_code), headers + body, len(body)
+
+# Erros de uma requisição bem formada (ex.: /favicon.ico inexistente): a conexão
+# continua aberta e o cliente não paga um novo handshake TCP na próxima requisição
+KEEP_ALIVE_ERRORS = frozenset({403, 404, 416})
+
+# Respostas de erro pré-montadas na importação; por requisição só entra o Date
+_ERROR_RESPONSES = {code: _render_error_response(code) for code in (400, 403, 404, 405, 500, 503)}
+
+def build_error_response(status_code):
+  """
+  Constrói uma resposta de erro HTTP simples.
+
+  Returns:
+    tuple: (resposta completa em bytes, tamanho do corpo)
+  """
+  buffers, body_length = error_response_parts(status_code)
+  return b"".join(buffers), body_length
+
+def error_response_parts(status_code):
+  """
+  Partes de uma resposta de erro HTTP simples, para envio vetorizado (sendmsg_all).
+
+  Returns:
+    tuple: ((linha de status, Date, cabeçalhos e corpo), tamanho do corpo)
+  """
+  status_line, rest, body_length = _ERROR_RESPONSES.get(status_code) or _render_error_response(status_code)
+  return (status_line, date_header_line(), rest), body_length
+
+def range_not_satisfiable_parts(file_size):
+  """
+  Partes de uma resposta 416, para envio vetorizado. Leva o Content-Range
+  "bytes */tamanho" (RFC 9110, seção 15.5.17) para o cliente saber o tamanho do arquivo.
+
+  Returns:
+    tuple: ((linha de status, Date, cabeçalhos e corpo), tamanho do corpo)
+  """
+  status_line, rest, body_length = _render_range_not_satisfiable(file_size)
+  return (status_line, date_header_line(), rest), body_length
+
+@lru_cache(maxsize=256)
+def _render_range_not_satisfiable(file_size):
+  """Partes fixas de uma resposta 416, memorizadas por tamanho do arquivo."""
+  return _render_error_response(416, {"Content-Range": f"bytes */{file_size}"})
+
+def sendmsg_all(sock, buffers, flags=0):
+  """
+  Envia vários buffers com sendmsg (scatter/gather), tratando envios parciais.
+
+  Sem sendmsg na plataforma (Windows), os buffers iniciais (cabeçalhos) são
+  juntados em um único envio e o último (corpo) é enviado sem cópia; `flags` é ignorado.
+  Respostas que cabem em um segmento TCP são juntadas por inteiro: um único
+  envio, um único pacote.
+  """
+  if not _HAS_SENDMSG:
+    if len(buffers[-1]) < _SINGLE_SEGMENT_BYTES:
+      sock.sendall(b"".join(buffers))
+      return
+    sock.sendall(b"".join(buffers[:-1]))
+    sock.sendall(buffers[-1])
+    return
+
+  views = [memoryview(b) for b in buffers]
+  while views:
+    sent = sock.sendmsg(views, (), flags)
+    # Descarta os buffers já enviados por completo e recorta o parcial
+    while views and sent >= len(views[0]):
+      sent -= len(views.pop(0))
+    if views and sent:
+      views[0] = views[0][sent:]
+
+def drain_zerocopy_completions(errqueue_sock):
+  """
+  Consome as notificações de conclusão do MSG_ZEROCOPY da fila de erros do socket.
+
+  O conteúdo enviado vem do cache, que mantém os bytes vivos; as notificações
+  só precisam ser lidas para não acumularem na fila de erros.
+
+  Returns:
+    bool: True se alguma notificação indicar que o kernel copiou os dados mesmo
+    assim (SO_EE_CODE_ZEROCOPY_COPIED, ex.: loopback): o zerocopy não compensa nessa conexão.
+  """
+  copied = False
+  while True:
+    try:
+      _, ancdata, _, _ = errqueue_sock.recvmsg(0, 1024, socket.MSG_ERRQUEUE | socket.MSG_DONTWAIT)
+    except (BlockingIOError, InterruptedError):
+      return copied
+    for _level, _type, data in ancdata:
+      # struct sock_extended_err: ee_errno, ee_origin, ee_type, ee_code, ee_pad, ee_info, ee_data
+      if len(data) >= _SOCK_EXTENDED_ERR.size:
+        _, origin, _, code, _, _, _ = _SOCK_EXTENDED_ERR.unpack_from(data)
+        if origin == _SO_EE_ORIGIN_ZEROCOPY and code & _SO_EE_CODE_ZEROCOPY_COPIED:
+          copied = True
+
+@contextmanager
+def corked(sock):
+  """
+  Liga TCP_CORK durante o bloco: o kernel só envia segmentos cheios (MSS) e,
+  ao sair, libera o restante. Sem TCP_CORK na plataforma (ou sem socket), não faz nada.
+  """
+  if _TCP_CORK is None or sock is None:
+    yield
+    return
+  sock.setsockopt(socket.IPPROTO_TCP, _TCP_CORK, 1)
+  try:
+    yield
+  finally:
+    sock.setsockopt(socket.IPPROTO_TCP, _TCP_CORK, 0)
+
+def open_for_streaming(filepath, size):
+  """
+  Abre um arquivo grande para envio por sendfile.
+
+  Sem buffer (FileIO): se o sendfile não estiver disponível, as leituras em blocos
+  vão direto para o buffer de envio, sem a cópia intermediária do BufferedReader.
+  O aviso POSIX_FADV_SEQUENTIAL amplia o readahead do kernel para o arquivo.
+  """
+  f = open(filepath, 'rb', buffering=0)
+  if _FADV_SEQUENTIAL is not None:
+    try:
+      os.posix_fadvise(f.fileno(), 0, size, _FADV_SEQUENTIAL)
+    except OSError:
+      pass  # Apenas uma dica: alguns sistemas de arquivos não a suportam
+  return f
+
+def sendfile_all(sock, file_obj, count, offset=0):
+  """
+  Envia `count` bytes do arquivo, a partir de `offset`, para o socket com socket.sendfile.
 
-class ClientThread(threading.Thread):
+  No Linux a cópia página de cache → socket acontece dentro do kernel
+  (os.sendfile), sem passar os bytes por objetos Python; a espera pelo socket
+  gravável (o socket tem timeout) é feita pela própria biblioteca padrão.
+  Se o sendfile não estiver disponível (plataforma, sistema de arquivos,
+  tipo de socket ou SSL), ela recai sozinha em leituras e envios em blocos.
   """
-  Thread para lidar com uma única conexão de cliente, suportando keep-alive.
+  return sock.sendfile(file_obj, offset, count)
+
+# Buffers de leitura por thread do pool (ver thread_recv_buffer)
+_recv_buffers = threading.local()
+
+def thread_recv_buffer():
+  """
+  Retorna a memoryview do buffer de leitura da thread atual, criado na primeira chamada.
+
+  Com recv_into nesse buffer, a leitura do socket não aloca um novo bytes a cada chamada.
+  """
+  view = getattr(_recv_buffers, "view", None)
+  if view is None:
+    view = _recv_buffers.view = memoryview(bytearray(config.RECV_BUFFER_BYTES))
+  return view
+
+class ClientHandler:
+  """
+  Lida com uma única conexão de cliente, suportando keep-alive.
+  Executado por uma thread do pool de workers (ver main).
   """
   def __init__(self, cliente_socket, client_address):
-    super().__init__()
     self.client_socket = cliente_socket
     self.client_address = client_address
-    self.daemon = True    # Permite que o programa principal saia mesmo se as threads estiverem ativas
+
+    # Cópia do descritor, sem timeout, para ler a fila de erros do MSG_ZEROCOPY
+    # sem esperar (criada na primeira resposta com zerocopy)
+    self.errqueue_socket = None
+    # O kernel avisou que copiou os dados de um envio zerocopy: não usar mais nesta conexão
+    self.zerocopy_copied = False
+    # Uma resposta com "Connection: close" foi enviada: o loop de keep-alive termina
+    self.close_requested = False
 
   def run(self):
     """
@@ -103,41 +1010,79 @@ class ClientThread(threading.Thread):
     # Define um timeout para a conexão. Se nenhuma requisição chegar, a conexão é fechada.
     self.client_socket.settimeout(config.KEEP_ALIVE_TIMEOUT)
 
+    # Bytes recebidos e ainda não processados (requisições em pipeline ou leituras parciais)
+    buffer = bytearray()
+    # Buffer de leitura da thread do pool, reutilizado entre recvs e conexões
+    recv_view = thread_recv_buffer()
+    recv_array = recv_view.obj
+
     try:
       while True:
         start_time = time()
 
-        # Recebe a requisição HTTP (limitada a 4096 bytes)
-        request_data = self.client_socket.recv(4096)
-        if not request_data:
-          # Cliente fechou a conexão
-          break
+        # Acumula leituras até ter o cabeçalho completo da próxima requisição
+        head = None
+        end = buffer.find(b"\r\n\r\n")
+        while end < 0:
+          if len(buffer) > config.MAX_REQUEST_BYTES:
+            self.send_error_response(400)
+            return
+
+          received = self.client_socket.recv_into(recv_view)
+          if not received:
+            # Cliente fechou a conexão
+            return
+
+          # O kernel volta ao ACK atrasado após cada recv; reativamos o ACK imediato (só Linux)
+          if _TCP_QUICKACK is not None:
+            self.client_socket.setsockopt(socket.IPPROTO_TCP, _TCP_QUICKACK, 1)
 
-        # Tenta decodificar a requisição para processamento
-        request_str = request_data.decode('utf-8', errors='ignore')
-        self.process_request(request_str, start_time)
+          if not buffer:
+            # Caso comum (nada pendente): a requisição chegou inteira em um recv. O fim do
+            # cabeçalho é buscado direto no buffer da thread e só o cabeçalho é copiado;
+            # apenas o que vier depois dele (pipeline) passa pelo acumulador
+            end = recv_array.find(b"\r\n\r\n", 0, received)
+            if end >= 0:
+              head = bytes(recv_view[:end])
+              buffer += recv_view[end + 4:received]
+              break
+
+          # Só a parte nova (mais 3 bytes de um CRLF CRLF dividido) precisa ser varrida
+          search_from = max(0, len(buffer) - 3)
+          buffer += recv_view[:received]
+          end = buffer.find(b"\r\n\r\n", search_from)
+
+        # Um único recv traz até RECV_BUFFER_BYTES: o limite vale para o cabeçalho encontrado
+        if end > config.MAX_REQUEST_BYTES:
+          self.send_error_response(400)
+          return
+
+        if head is None:
+          head = bytes(buffer[:end])
+          del buffer[:end + 4]
+        self.process_request(head, start_time)
+        if self.close_requested:
+          return
 
     except socket.timeout:
-      logging.info(f"Conexão com {self.client_address[0]} expirou (timeout).")
+      logging.debug("Conexão com %s expirou (timeout).", self.client_address[0])
     except Exception as e:
       logging.error(f"Erro na thread do cliente {self.client_address[0]}: {e}")
     finally:
+      if self.errqueue_socket is not None:
+        self.errqueue_socket.close()
       self.client_socket.close()
 
-  def process_request(self, request_str, start_time):
+  def process_request(self, head, start_time):
     """
-    Analisa a requisição HTTP, gerencia o cache e envia a resposta.
+    Analisa a requisição HTTP (cabeçalho em bytes ou bytearray), gerencia o cache e envia a resposta.
     Centraliza o log de métricas no final da execução.
     """
     status_code = 500 # Status padrão para erro inesperado
     bytes_sent = 0
     cache_status = "N/A"
 
-    try:
-      first_line = request_str.split('\r\n')[0]
-      method, path, _ = first_line.split()
-    except ValueError:
-      method, path = "INVALID", "INVALID"
+    method, path, request_headers = parse_request(head, REQUEST_HEADERS_USED)
     
     try:
       # --- Lógica de Roteamento e Validação ---
@@ -150,60 +1095,78 @@ class ClientThread(threading.Thread):
       if path == '/':
         path = '/index.html'
 
-      # Constrói o caminho absoluto do arquivo
-      base_dir = os.path.abspath(config.WWW_ROOT)
-      filepath = os.path.join(base_dir, path.lstrip('/'))
+      # Caminho rápido: páginas populares com a resposta pronta, sem stat nem cache
+      not_modified = lookup_hot_not_modified(path, request_headers)
+      if not_modified is not None:
+        status_code = 304
+        cache_status = "CONDITIONAL_HIT"
+        sendmsg_all(self.client_socket, (STATUS_LINE_304, date_header_line(), not_modified))
+        return
 
-      # Segurança: Garante que o arquivo está dentro do diretório permitido
-      if not os.path.abspath(filepath).startswith(base_dir):
+      hot = lookup_hot_response(path, request_headers)
+      if hot is not None:
+        status_code = 200
+        cache_status = "HIT"
+        header_tail, body = hot.select(request_headers.get('accept-encoding', ''))
+        bytes_sent = self.send_body(header_tail, body, cache_status)
+        return
+
+      # Constrói o caminho absoluto do arquivo (None se escapar de WWW_ROOT)
+      filepath = resolve_path(path)
+      if filepath is None:
         status_code = 403
         bytes_sent = self.send_error_response(status_code)
         return
       
-      # Verifica se o arquivo existe
-      if not os.path.exists(filepath) or not os.path.isfile(filepath):
+      # Verifica se o arquivo existe (um único stat serve para ETag, data e tamanho)
+      file_stat = stat_file(filepath)
+      if file_stat is None:
         status_code = 404
         bytes_sent = self.send_error_response(status_code)
         return
-      
-      # Extraio os cabeçalhos da requisição
-      request_headers = parse_headers(request_str)
+
 
       # --- Lógica de Cache Condicional ---
-      current_etag = generate_etag(filepath)
-      last_modified_time = os.path.getmtime(filepath)
+      current_etag = file_etag(filepath, file_stat)
+      last_modified_time = file_stat.st_mtime
 
-      # Chega o If-None-Match (ETag) - tem prioridade
-      if_none_match = request_headers.get('if-none-match')
-      if if_none_match and if_none_match == current_etag:
+      if is_not_modified(request_headers, current_etag, last_modified_time):
         status_code = 304
         cache_status = "CONDITIONAL_HIT"
-        bytes_sent = self.send_not_modified_response(current_etag, last_modified_time)
+        bytes_sent = self.send_not_modified_response(filepath, current_etag, last_modified_time)
         return
-      
-      # Checa o If-Modified-Since (Data de Modificação)
-      if_modified_since_str = request_headers.get('if-modified-since')
-      if if_modified_since_str and not if_none_match:
-        if_modified_since_time = parse_http_date(if_modified_since_str)
-        # Se o arquivo não foi modificado desde a data enviada pelo cleinte
-        if if_modified_since_time and int(last_modified_time) <= if_modified_since_time:
-          status_code = 304
-          cache_status = "CONDITIONAL_HIT"
-          bytes_sent = self.send_not_modified_response(current_etag, last_modified_time)
-          return
         
       # --- Servir o Arquivo (com captura de métricas) ---
       status_code = 200
 
       # Lógica de streaming movida para cá para capturar métricas corretamente
-      file_size = os.path.getsize(filepath)
-      streaming_threshold_bytes = config.STREAMING_THRESHOLD_MB * 1024 * 1024
-      if file_size > streaming_threshold_bytes:
+      file_size = file_stat.st_size
+      byte_range = parse_byte_range(request_headers, current_etag, last_modified_time, file_size)
+      if byte_range == RANGE_NOT_SATISFIABLE:
+        status_code = 416
+        buffers, bytes_sent = range_not_satisfiable_parts(file_size)
+        sendmsg_all(self.client_socket, buffers)
+      elif byte_range is not None:
+        # Intervalos saem direto do disco via sendfile a partir do deslocamento, sem o cache
+        status_code = 206
+        cache_status = "STREAMING"
+        self.stream_file(filepath, file_size, current_etag, last_modified_time, cache_status, byte_range)
+        bytes_sent = byte_range[1] - byte_range[0] + 1
+      elif file_size > config.STREAMING_THRESHOLD_BYTES:
         self.stream_file(filepath, file_size, current_etag, last_modified_time)
         bytes_sent = file_size
         cache_status = "STREAMING"
+      elif not config.ENABLE_CACHE:
+        # Sem cache, o corpo não seria guardado: sai direto do page cache via sendfile,
+        # sem ser lido para a memória do processo
+        cache_status = "DISABLED"
+        self.stream_file(filepath, file_size, current_etag, last_modified_time, cache_status)
+        bytes_sent = file_size
       else:
-        bytes_sent, cache_status = self.send_file_response(filepath, current_etag, last_modified_time)
+        bytes_sent, cache_status = self.send_file_response(
+          filepath, current_etag, last_modified_time, path, request_headers.get('accept-encoding', ''),
+          file_size
+        )
         
     except Exception as e:
       # Em caso de um erro não tratado, loga o erro e envia 500
@@ -218,212 +1181,274 @@ class ClientThread(threading.Thread):
       # --- PONTO ÚNICO DE LOG DE MÉTRICAS ---
       response_time_ms = (time() - start_time) * 1000
       metrics_logger.log_request(
-        client_ip=self.client_address[0],
-        method=method,
-        path=path,
-        status=status_code,
-        response_time_ms=response_time_ms,
-        bytes_sent=bytes_sent,
-        cache_status=cache_status
+        self.client_address[0], method, path, status_code,
+        response_time_ms, bytes_sent, cache_status
       )
 
-  def send_not_modified_response(self, etag, last_modified_time):
+  def send_not_modified_response(self, filepath, etag, last_modified_time):
     """
     Envia uma resposta 304 Not Modified com os cabeçalhos apropriados.
     """
-    extra_headers = {
-      "ETag": etag,
-      "Last-Modified": formatdate(timeval=last_modified_time, localtime=False, usegmt=True),
-      # Cache-Control pode ser adicionado para maior controle
-    }
-    response_headers = self.build_headers(304, extra_headers)
-    self.client_socket.sendall(response_headers.encode('utf-8'))
+    sendmsg_all(self.client_socket, not_modified_response_parts(filepath, etag, last_modified_time))
 
     return 0  # Nenhum byte de corpo é enviado
     
-  # send_file_response agora aceita etag e last_modified para incluir nos cabeçalhos
-  def send_file_response(self, filepath, etag, last_modified_time):
-    """
-    Envia uma resposta 200 OK com o conteúdo do arquivo.
-    Usa streaming se o arquivo for maior que o limiar definido em config.
-    Primeiro, tenta obter o conteúdo do cache. Se falhar (miss),
-    lê do disco e armazena no cache para futuras requisições.
+  def send_file_response(self, filepath, etag, last_modified_time, path=None, accept_encoding="",
+                         file_size=None):
     """
+    Envia uma resposta 200 OK com o conteúdo de um arquivo pequeno (servido via cache).
+    Arquivos acima do limiar de streaming são tratados por stream_file.
 
-    cache_status = "DISABLED"
-    file_content = None
-    cached_data = None
-
-    # --- Etapa 1: Consultar o Cache ---
-    if config.ENABLE_CACHE:
-      cached_data = cache_instance.get(filepath)
-      if cached_data:
-        # Cache HIT! Agora, vamos REVALIDAR.
-        cached_etag = cached_data.get('etag')
-        current_etag = etag # Usamos a ETag já calculada no process_request
-
-        if cached_etag == current_etag:
-          # ETag bate! O cache é válido.
-          cache_status = "HIT"
-          logging.info(f"Cache HIT para o arquivo: {filepath} (Válido)")
-          file_content = cached_data.get('content')
-        else:
-          # ETag diferente! O cache está OBSOLETO (stale)
-          cache_status = "STALE"
-          logging.info(f"Cache STALE para o arquivo: {filepath}. Invalidando.")
-          cache_instance.invalidate(filepath)
-      else:
-        cache_status = "MISS"
-        logging.info(f"Cache MISS para o arquivo: {filepath}")
+    Se `path` (caminho da URL) for um dos HOT_PATHS, a entrada do cache também é
+    guardada para o caminho rápido de process_request.
+    """
+    # Erros de leitura sobem para process_request, que responde 500
+    header_tail, body, cache_status, cached = load_file_response(
+      filepath, etag, last_modified_time, accept_encoding, file_size
+    )
+    if path is not None:
+      remember_hot_response(path, cached)
 
-    # --- Etapa 2: Ler do Disco (se cache miss ou stale) ---
-    if file_content is None:
-      try:
-        # Limita o cache para arquivos menores que o limitar de streaming
-        file_size = os.path.getsize(filepath)
-        streaming_threshold_bytes = config.STREAMING_THRESHOLD_MB * 1024 * 1024
+    return self.send_body(header_tail, body, cache_status), cache_status
 
-        if file_size > streaming_threshold_bytes:
-          self.stream_file(filepath, file_size, etag, last_modified_time)
-          return
-        
-        with open(filepath, 'rb') as f:
-          file_content = f.read()
-
-        # --- Etapa 3: Armazenar no Cache (após ler do disco) ---
-        if config.ENABLE_CACHE:
-          # Guardamos um dicionário com conteúdo e a ETag atual
-          data_to_cache = {
-            'content': file_content,
-            'etag': etag
-          }
-          cache_instance.set(filepath, data_to_cache, config.DEFAULT_TTL_SECONDS)
-      except Exception as e:
-        logging.error(f"Erro ao ler o arquivo {filepath}: {e}")
-        self.send_error_response(500)
-        return
-      
-    # --- Etapa 4: Enviar a Resposta Completa ---
+  def send_body(self, header_tail, file_content, cache_status):
+    """
+    Envia linha de status, Date, cabeçalhos prontos e corpo. Retorna os bytes de corpo enviados.
+    """
+    # --- Enviar a Resposta Completa ---
     # Esta parte é executada tanto para cache hit quanto para miss (com conteúdo lido do disco)
     try:
-      mime_type = get_mime_type(filepath)
-      headers = self.build_headers(200, {
-        "Content-Type": mime_type,
-        "Content-Length": len(file_content),
-        "Connection": "keep-alive",
-        "X-Cache-Status": cache_status,
-        "ETag": etag,
-        "Last-Modified": formatdate(timeval=last_modified_time, localtime=False, usegmt=True)
-      })
-      self.client_socket.sendall(headers.encode('utf-8') + file_content)
-
-      return len(file_content), cache_status
+      # Corpos grandes vindos do cache podem ser enviados sem cópia (MSG_ZEROCOPY)
+      flags = 0
+      if cache_status == "HIT" and len(file_content) >= config.ZEROCOPY_MIN_BYTES and self.enable_zerocopy():
+        flags = _MSG_ZEROCOPY
+
+      # Cabeçalhos e corpo em uma única chamada vetorizada, sem concatenar os bytes
+      # Só o Date muda entre respostas; o resto dos cabeçalhos vem pronto do cache
+      sendmsg_all(self.client_socket, (STATUS_LINE_200, date_header_line(), header_tail, file_content), flags)
+      if flags and drain_zerocopy_completions(self.errqueue_socket):
+        self.zerocopy_copied = True
+
+      return len(file_content)
     
     except Exception as e:
-      logging.error(f"Erro ao enviar resposta para {filepath}: {e}")
-      return 0, cache_status # Nenhum byte enviado em caso de erro
+      logging.error(f"Erro ao enviar resposta: {e}")
+      return 0 # Nenhum byte enviado em caso de erro
   
-  def stream_file(self, filepath, file_size, etag, last_modified_time):
-    """Função dedicada para servir arquivos grandes por streaming (não usa cache)."""
-    logging.info(f"Servindo arquivo '{filepath}' por streaming (tamanho: {file_size} bytes)")
-    mime_type = get_mime_type(filepath)
-    headers = self.build_headers(200, {
-      "Content-Type": mime_type,
-      "Content-Length": file_size,
-      "Connection": "keep-alive",
-      "X-Cache-Status": "STREAMING", # Indica que foi servido por streaming
-      "ETag": etag,
-      "Last-Modified": formatdate(timeval=last_modified_time, localtime=False, usegmt=True)
-    })
-    self.client_socket.sendall(headers.encode('utf-8'))
-
-    with open(filepath, 'rb') as f:
-      while True:
-        chunk = f.read(config.CHUNK_SIZE_BYTES)
-        if not chunk:
-          break
-        self.client_socket.sendall(chunk)
-
-  def send_error_response(self, status_code):
+  def enable_zerocopy(self):
     """
-    Envia uma resposta de errro HTTP simples.
+    Habilita SO_ZEROCOPY na conexão (uma vez). Retorna False se desabilitado ou sem suporte.
     """
-    error_messages = {
-      400: "Bad Request", 403: "Forbidden", 404: "Not Found",
-      405: "Method Not Allowed", 500: "Internal Server Error"
-    }
-    status_text = error_messages.get(status_code, "Unknown Error")
-    body = f"<h1>{status_code} {status_text}</h1>".encode('utf-8')
-
-    headers = self.build_headers(status_code, {
-      "Content-Type": "text/html; charset=utf-8",
-      "Content-Length": len(body),
-      "Connection": "close"     # Fecha a conexão após um erro
-    })
-
-    full_response = headers.encode('utf-8') + body
-    self.client_socket.sendall(full_response)
+    if not config.ZEROCOPY_ENABLED or not _ZEROCOPY_SUPPORTED or self.zerocopy_copied:
+      return False
+    if self.errqueue_socket is None:
+      try:
+        self.client_socket.setsockopt(socket.SOL_SOCKET, _SO_ZEROCOPY, 1)
+        self.errqueue_socket = socket.socket(fileno=os.dup(self.client_socket.fileno()))
+      except OSError as e:
+        logging.error(f"MSG_ZEROCOPY indisponível: {e}")
+        return False
+    return True
 
-    return len(body)
+  def stream_file(self, filepath, file_size, etag, last_modified_time, cache_status="STREAMING", byte_range=None):
+    """
+    Função dedicada para servir arquivos grandes por streaming (não usa cache).
+    Com `byte_range` (início, fim), envia só esse intervalo em uma resposta 206.
+    """
+    logging.debug("Servindo arquivo '%s' por streaming (tamanho: %d bytes)", filepath, file_size)
+    # "STREAMING" no X-Cache-Status indica que foi servido por streaming
+    if byte_range is None:
+      headers = build_file_headers(filepath, file_size, cache_status, etag, last_modified_time)
+      offset, count = 0, file_size
+    else:
+      headers = build_partial_headers(filepath, byte_range, file_size, cache_status, etag, last_modified_time)
+      offset, count = byte_range[0], byte_range[1] - byte_range[0] + 1
+    # Com o socket "rolhado", os cabeçalhos saem no mesmo segmento do início do arquivo
+    with corked(self.client_socket):
+      self.client_socket.sendall(headers)
+      with open_for_streaming(filepath, file_size) as f:
+        sendfile_all(self.client_socket, f, count, offset)
 
-  def build_headers(self, status_code, extra_headers):
+  def send_error_response(self, status_code):
     """
-    Constrói a linha de status e os cabeçalhos HTTP.
+    Envia uma resposta de errro HTTP simples.
     """
-    status_messages = {
-      200: "OK", 304: "Not Modified", 400: "Bad Request", 403: "Forbidden", 
-      404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"
-    }
-    status_text = status_messages.get(status_code, "Unknown Status")
+    buffers, body_length = error_response_parts(status_code)
+    sendmsg_all(self.client_socket, buffers)
+    if status_code not in KEEP_ALIVE_ERRORS:
+      self.close_requested = True
 
-    response_line = f"HTTP/1.1 {status_code} {status_text}\r\n"
+    return body_length
 
-    headers = {
-      "Date": datetime.now(timezone.utc).strftime('%a, %d %b %Y %H:%M:%S GMT'),
-      "Server": "PythonSimpleServer/1.0",
-    }
-    headers.update(extra_headers)
+def serve_connection(client_socket, client_address):
+  """
+  Atende uma conexão em uma thread do pool.
+  """
+  ClientHandler(client_socket, client_address).run()
 
-    headers_str = "".join(f"{k}: {v}\r\n" for k, v in headers.items())
-    return f"{response_line}{headers_str}\r\n"
+def reject_connection(client_socket, client_address):
+  """
+  Responde 503 e fecha a conexão quando o servidor está saturado.
+  """
+  logging.error(f"Servidor saturado; recusando conexão de {client_address[0]}")
+  try:
+    # Um único send não bloqueante: a resposta cabe no buffer de envio de um socket
+    # recém-aceito, e o loop de accept nunca espera por um cliente lento
+    client_socket.setblocking(False)
+    full_response, _ = build_error_response(503)
+    client_socket.send(full_response)
+  except OSError:
+    pass
+  finally:
+    client_socket.close()
 
-def main(host, port):
+def create_listen_socket(host, port, reuse_port=False):
   """
-  Função principal que inicia o servidor.
+  Cria o socket TCP de escuta já com bind e listen.
+
+  Quando o listen retorna, o kernel já enfileira as conexões no backlog: quem cria
+  o socket antes de iniciar o servidor (ex.: os testes) pode conectar na hora.
   """
   # Cria um socket TCP/IP
   server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-  # Permite reutilizar o endereço para evitar erro "Address already in use"
-  server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-
   try:
+    # Permite reutilizar o endereço para evitar erro "Address already in use"
+    server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+      server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    server_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
     server_socket.bind((host, port))
     server_socket.listen(config.MAX_CONNECTIONS)
+  except OSError:
+    server_socket.close()
+    raise
+  return server_socket
+
+def main(host, port, reuse_port=False, sock=None):
+  """
+  Função principal que inicia o servidor.
+
+  Com reuse_port, vários processos podem escutar na mesma porta (SO_REUSEPORT)
+  e o kernel distribui as novas conexões entre eles (ver main_multiprocess).
+  Com sock, usa um socket de escuta já pronto (ver create_listen_socket).
+  """
+  register_mime_types(config.WWW_ROOT)
+
+  # Número fixo de threads atendendo conexões, em vez de uma thread por conexão
+  pool = ThreadPoolExecutor(max_workers=config.MAX_WORKERS, thread_name_prefix="http-worker")
+  # Vagas para conexões no pool (em atendimento ou esperando um worker); cada
+  # vaga é devolvida quando o atendimento da conexão termina
+  slots = threading.BoundedSemaphore(config.MAX_WORKERS + config.MAX_QUEUED_CONNECTIONS)
+
+  def release_slot(client_socket, future):
+    # Jobs ainda na fila quando o servidor encerra são cancelados (cancel_futures) sem
+    # chegar ao serve_connection: o socket aceito é fechado aqui, senão vazaria
+    if future.cancelled():
+      client_socket.close()
+    slots.release()
+
+  server_socket = sock
+  try:
+    if server_socket is None:
+      server_socket = create_listen_socket(host, port, reuse_port)
     logging.info(f"Servidor escutando em http://{host}:{port}")
     logging.info("Pressione Ctrl+C para encerrar.")
 
     while True:
       # Aceita uma nova conexão
       client_socket, client_address = server_socket.accept()
-      logging.info(f"Conexão aceita de {client_address[0]}:{client_address[1]}")
+      # DEBUG e formatação preguiçosa: no nível INFO, a thread de accept não formata nada
+      logging.debug("Conexão aceita de %s:%d", client_address[0], client_address[1])
+
+      # Com todos os workers ocupados e a fila cheia, recusa em vez de acumular conexões
+      # (antes de configurar o socket, que seria descartado)
+      if not slots.acquire(blocking=False):
+        reject_connection(client_socket, client_address)
+        continue
 
-      # Cria e inicia uma nova thread para o cliente
-      # AVISO: Criar uma thread por conexão é um anti-padrão em produção
-      # devido ao alto consumo de recursos. Usado aqui apenas para fins didáticos.
-      new_thread = ClientThread(client_socket, client_address)
-      new_thread.start()
+      # Modo bloqueante explícito: o socket não herda um timeout padrão
+      # (socket.setdefaulttimeout); o ClientHandler define o seu próprio
+      client_socket.setblocking(True)
+      # Desliga o algoritmo de Nagle: cabeçalhos e corpos pequenos saem sem esperar ACK
+      client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+      # Detecta pares mortos em sessões keep-alive ociosas
+      client_socket.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+      # Buffers maiores que o padrão do kernel: arquivos grandes saem com menos syscalls
+      # e requisições em pipeline são drenadas de uma vez
+      client_socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, config.SOCKET_SNDBUF_BYTES)
+      client_socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, config.SOCKET_RCVBUF_BYTES)
+      # Limita os bytes ainda não enviados no kernel: clientes lentos não acumulam megabytes
+      if _TCP_NOTSENT_LOWAT is not None:
+        client_socket.setsockopt(socket.IPPROTO_TCP, _TCP_NOTSENT_LOWAT, config.TCP_NOTSENT_LOWAT_BYTES)
+
+      future = pool.submit(serve_connection, client_socket, client_address)
+      future.add_done_callback(partial(release_slot, client_socket))
 
   except OSError as e:
     logging.error(f"Erro ao iniciar o servidor: {e}. A porta {port} já está em uso?")
   except KeyboardInterrupt:
     logging.info("Servidor encerrado pelo usuário.")
   finally:
-    server_socket.close()
+    if server_socket is not None:
+      server_socket.close()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def _worker_process(host, port, cpu):
+  """
+  Ponto de entrada de cada processo worker: fixa o processo em uma CPU (se
+  possível) e roda seu próprio loop de accept, com cache e pool próprios.
+  """
+  if cpu is not None and hasattr(os, "sched_setaffinity"):
+    try:
+      os.sched_setaffinity(0, {cpu})
+    except OSError as e:
+      logging.error(f"Não foi possível fixar o worker na CPU {cpu}: {e}")
+  main(host, port, reuse_port=True)
+
+def main_multiprocess(host, port, workers):
+  """
+  Inicia `workers` processos, cada um com um socket de escuta na mesma porta (SO_REUSEPORT).
+
+  Cada processo tem seu próprio GIL, então o servidor passa a usar vários núcleos.
+  Os processos são criados com "spawn": cada um importa o módulo do zero e inicia
+  suas próprias threads de log e de métricas.
+  """
+  if not hasattr(socket, "SO_REUSEPORT"):
+    logging.error("SO_REUSEPORT não é suportado nesta plataforma; usando um único processo.")
+    main(host, port)
+    return
+
+  cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else []
+  ctx = multiprocessing.get_context("spawn")
+  processes = [
+    ctx.Process(
+      target=_worker_process, name=f"http-worker-{i}",
+      args=(host, port, cpus[i % len(cpus)] if cpus else None)
+    )
+    for i in range(workers)
+  ]
+  for process in processes:
+    process.start()
+  logging.info(f"{workers} processos worker escutando em http://{host}:{port}")
+
+  try:
+    for process in processes:
+      process.join()
+  except KeyboardInterrupt:
+    # Os workers recebem o mesmo Ctrl+C e encerram sozinhos
+    for process in processes:
+      process.join()
 
 if __name__ == "__main__":
   parser = argparse.ArgumentParser(description="Servidor HTTP Minimal em Python")
   parser.add_argument('--port', type=int, default=config.PORT,
                       help=f"Porta para o servidor escutar (padrão: {[config.PORT]})")
+  parser.add_argument('--workers', type=int, default=1,
+                      help="Número de processos (SO_REUSEPORT); 0 usa um por CPU (padrão: 1)")
   args = parser.parse_args()
 
-  main(config.HOST, args.port)
\ No newline at end of file
+  workers = args.workers or os.cpu_count() or 1
+  if workers > 1:
+    main_multiprocess(config.HOST, args.port, workers)
+  else:
+    main(config.HOST, args.port)
\ No newline at end of file
@@ -0,0 +1,267 @@
+# app/server_async.py
+
+import asyncio
+import logging
+import argparse
+from time import time
+
+# uvloop é opcional: sem ele, usa o loop padrão do asyncio
+try:
+  import uvloop
+except ImportError:
+  uvloop = None
+
+# Importa as configurações
+from . import config
+
+# Reutiliza a lógica HTTP do servidor com threads (o import também configura o logging)
+from .server import (
+  resolve_path, stat_file, is_not_modified, lookup_cached_file, read_file_response, parse_request,
+  file_etag, date_header_line, build_file_headers, not_modified_response_parts,
+  error_response_parts, corked, open_for_streaming, register_mime_types, parse_byte_range,
+  build_partial_headers, range_not_satisfiable_parts, RANGE_NOT_SATISFIABLE, REQUEST_HEADERS_USED,
+  STATUS_LINE_200
+)
+from .metrics import metrics_logger
+
+"""
+Servidor HTTP orientado a eventos: uma única thread com um loop asyncio
+(epoll no Linux) atende todas as conexões, no lugar de uma thread por conexão.
+"""
+
+async def handle_client(reader, writer):
+  """
+  Corrotina que atende uma conexão, suportando keep-alive.
+  """
+  client_ip = writer.get_extra_info('peername')[0]
+
+  try:
+    while True:
+      try:
+        # Lê o cabeçalho completo; a conexão ociosa expira após KEEP_ALIVE_TIMEOUT
+        request_data = await asyncio.wait_for(
+          reader.readuntil(b'\r\n\r\n'), timeout=config.KEEP_ALIVE_TIMEOUT
+        )
+      except asyncio.TimeoutError:
+        logging.debug("Conexão com %s expirou (timeout).", client_ip)
+        break
+      except asyncio.IncompleteReadError:
+        # Cliente fechou a conexão
+        break
+      except asyncio.LimitOverrunError:
+        await send_error_response(writer, 400)
+        break
+
+      start_time = time()
+      keep_alive = await process_request(writer, client_ip, request_data[:-4], start_time)
+      if not keep_alive:
+        break
+
+  except (ConnectionError, OSError) as e:
+    logging.debug("Conexão com %s encerrada: %s", client_ip, e)
+  except Exception as e:
+    logging.error(f"Erro na conexão do cliente {client_ip}: {e}")
+  finally:
+    writer.close()
+    try:
+      await writer.wait_closed()
+    except (ConnectionError, OSError):
+      pass
+
+async def process_request(writer, client_ip, head, start_time):
+  """
+  Analisa a requisição HTTP (cabeçalho em bytes) e envia a resposta pelo writer.
+
+  Returns:
+    bool: True se a conexão pode ser reutilizada (keep-alive).
+  """
+  status_code = 500 # Status padrão para erro inesperado
+  bytes_sent = 0
+  cache_status = "N/A"
+
+  method, path, request_headers = parse_request(head, REQUEST_HEADERS_USED)
+
+  try:
+    # --- Lógica de Roteamento e Validação ---
+    if method != 'GET':
+      status_code = 405
+      bytes_sent = await send_error_response(writer, status_code)
+      return False
+
+    # Normaliza o path
+    if path == '/':
+      path = '/index.html'
+
+    filepath = resolve_path(path)
+    if filepath is None:
+      status_code = 403
+      bytes_sent = await send_error_response(writer, status_code)
+      return True
+
+    file_stat = stat_file(filepath)
+    if file_stat is None:
+      status_code = 404
+      bytes_sent = await send_error_response(writer, status_code)
+      return True
+
+    # --- Lógica de Cache Condicional ---
+    current_etag = file_etag(filepath, file_stat)
+    last_modified_time = file_stat.st_mtime
+
+    if is_not_modified(request_headers, current_etag, last_modified_time):
+      status_code = 304
+      cache_status = "CONDITIONAL_HIT"
+      writer.writelines(not_modified_response_parts(filepath, current_etag, last_modified_time))
+      await writer.drain()
+      return True
+
+    # --- Servir o Arquivo ---
+    status_code = 200
+    file_size = file_stat.st_size
+    byte_range = parse_byte_range(request_headers, current_etag, last_modified_time, file_size)
+    if byte_range == RANGE_NOT_SATISFIABLE:
+      status_code = 416
+      buffers, bytes_sent = range_not_satisfiable_parts(file_size)
+      writer.writelines(buffers)
+      await writer.drain()
+    elif byte_range is not None:
+      # Intervalos saem direto do disco via sendfile a partir do deslocamento, sem o cache
+      status_code = 206
+      cache_status = "STREAMING"
+      await stream_file(writer, filepath, file_size, current_etag, last_modified_time, cache_status, byte_range)
+      bytes_sent = byte_range[1] - byte_range[0] + 1
+    elif file_size > config.STREAMING_THRESHOLD_BYTES:
+      cache_status = "STREAMING"
+      await stream_file(writer, filepath, file_size, current_etag, last_modified_time)
+      bytes_sent = file_size
+    elif not config.ENABLE_CACHE:
+      # Sem cache, o corpo não seria guardado: sai direto do page cache via sendfile
+      cache_status = "DISABLED"
+      await stream_file(writer, filepath, file_size, current_etag, last_modified_time, cache_status)
+      bytes_sent = file_size
+    else:
+      accept_encoding = request_headers.get('accept-encoding', '')
+      cached, cache_status = lookup_cached_file(filepath, current_etag)
+      if cached is not None:
+        header_tail, file_content = cached.select(accept_encoding)
+      else:
+        # Leitura do disco e compressão bloqueiam: rodam no pool padrão, fora do loop
+        header_tail, file_content, cache_status, _ = await asyncio.get_running_loop().run_in_executor(
+          None, read_file_response,
+          filepath, current_etag, last_modified_time, accept_encoding, file_size, cache_status
+        )
+      writer.writelines((STATUS_LINE_200, date_header_line(), header_tail, file_content))
+      await writer.drain()
+      bytes_sent = len(file_content)
+    return True
+
+  except Exception as e:
+    # Em caso de um erro não tratado, loga o erro e envia 500
+    logging.error(f"Erro inesperado ao processar '{method} {path}': {e}")
+    try:
+      status_code = 500
+      bytes_sent = await send_error_response(writer, status_code)
+    except (ConnectionError, OSError):
+      # Se até o envio do erro falhar, não há muito o que fazer
+      pass
+    return False
+  finally:
+    # --- PONTO ÚNICO DE LOG DE MÉTRICAS ---
+    response_time_ms = (time() - start_time) * 1000
+    metrics_logger.log_request(
+      client_ip, method, path, status_code,
+      response_time_ms, bytes_sent, cache_status
+    )
+
+async def stream_file(writer, filepath, file_size, etag, last_modified_time, cache_status="STREAMING",
+                      byte_range=None):
+  """
+  Serve arquivos grandes com loop.sendfile: no loop padrão a cópia é feita pelo
+  kernel (os.sendfile). Loops que não implementam loop.sendfile (o do uvloop
+  herda o de AbstractEventLoop, que levanta NotImplementedError) recaem em
+  copy_file_in_chunks. Com `byte_range` (início, fim), envia só esse intervalo
+  em uma resposta 206.
+  """
+  logging.debug("Servindo arquivo '%s' por streaming (tamanho: %d bytes)", filepath, file_size)
+  loop = asyncio.get_running_loop()
+
+  # O sendfile espera o buffer do transporte esvaziar, então os cabeçalhos saem antes
+  # do arquivo; com o socket "rolhado", saem no mesmo segmento do início do arquivo
+  if byte_range is None:
+    headers = build_file_headers(filepath, file_size, cache_status, etag, last_modified_time)
+    offset, count = 0, file_size
+  else:
+    headers = build_partial_headers(filepath, byte_range, file_size, cache_status, etag, last_modified_time)
+    offset, count = byte_range[0], byte_range[1] - byte_range[0] + 1
+  with corked(writer.get_extra_info('socket')), open_for_streaming(filepath, file_size) as f:
+    writer.write(headers)
+    try:
+      await loop.sendfile(writer.transport, f, offset, count)
+    except NotImplementedError:
+      # Levantado antes de qualquer byte do arquivo sair: os cabeçalhos já estão na fila
+      await copy_file_in_chunks(writer, f, offset, count)
+
+async def copy_file_in_chunks(writer, f, offset, count):
+  """
+  Envia `count` bytes do arquivo, a partir de `offset`, em blocos de CHUNK_SIZE_BYTES.
+
+  Cada bloco é lido com readinto em um único buffer; o transporte pode guardar o
+  que escrevemos até o envio, então vai para ele uma cópia do trecho lido.
+  """
+  f.seek(offset)
+  buffer = bytearray(min(config.CHUNK_SIZE_BYTES, count))
+  view = memoryview(buffer)
+  while count > 0:
+    n = f.readinto(view[:min(len(buffer), count)])
+    if not n:
+      raise EOFError(f"Arquivo terminou antes do esperado ({count} bytes faltando)")
+    writer.write(bytes(view[:n]))
+    await writer.drain()
+    count -= n
+
+async def send_error_response(writer, status_code):
+  """Envia uma resposta de erro HTTP simples e retorna o tamanho do corpo."""
+  buffers, body_length = error_response_parts(status_code)
+  writer.writelines(buffers)
+  await writer.drain()
+  return body_length
+
+async def serve(host, port, sock=None):
+  """
+  Abre o socket de escuta (ou usa o socket já pronto em sock) e atende conexões
+  até ser cancelado.
+  """
+  register_mime_types(config.WWW_ROOT)
+  if sock is not None:
+    server = await asyncio.start_server(handle_client, sock=sock, limit=config.MAX_REQUEST_BYTES)
+  else:
+    server = await asyncio.start_server(
+      handle_client, host, port,
+      backlog=config.MAX_CONNECTIONS, limit=config.MAX_REQUEST_BYTES, reuse_address=True
+    )
+  logging.info(f"Servidor (asyncio) escutando em http://{host}:{port}")
+  logging.info("Pressione Ctrl+C para encerrar.")
+  async with server:
+    await server.serve_forever()
+
+def main(host, port, sock=None):
+  """
+  Função principal que inicia o servidor orientado a eventos.
+  """
+  # uvloop (opcional) substitui o loop padrão por um baseado em libuv, mais rápido
+  run = uvloop.run if uvloop is not None else asyncio.run
+
+  try:
+    run(serve(host, port, sock))
+  except OSError as e:
+    logging.error(f"Erro ao iniciar o servidor: {e}. A porta {port} já está em uso?")
+  except KeyboardInterrupt:
+    logging.info("Servidor encerrado pelo usuário.")
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Servidor HTTP Minimal em Python (asyncio)")
+  parser.add_argument('--port', type=int, default=config.PORT,
+                      help=f"Porta para o servidor escutar (padrão: {config.PORT})")
+  args = parser.parse_args()
+
+  main(config.HOST, args.port)
\ No newline at end of file
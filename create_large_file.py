@@ -13,13 +13,18 @@ FILE_PATH = "www/image_large.jpg"
 # Gera um arquivo de 3 MB (3 * 1024 * 1024 bytes)
 FILE_SIZE_MB = 3
 FILE_SIZE_BYTES = FILE_SIZE_MB * 1024 * 1024
-CHUNK_SIZE = 1024 # Escreve em chunks de 1KB
+# Escreve em blocos de até 16 MB: um arquivo de 3 MB sai com um único urandom e um
+# único write, e arquivos maiores não precisam caber inteiros na memória
+CHUNK_SIZE = 16 * 1024 * 1024
 
 try:
   with open(FILE_PATH, 'wb') as f:
     # Gera bytes aletórios para simular o conteúdo de uma imagem
-    for _ in range(FILE_SIZE_BYTES // CHUNK_SIZE):
-      f.write(os.urandom(CHUNK_SIZE))
+    written = 0
+    while written < FILE_SIZE_BYTES:
+      n = min(CHUNK_SIZE, FILE_SIZE_BYTES - written)
+      f.write(os.urandom(n))
+      written += n
   print(f"Arquivo '{FILE_PATH} de {FILE_SIZE_MB}MB criado com sucesso.")
 except IOError as e:
   print(f"Erro ao criar o arquivo: {e}")
\ No newline at end of file
@@ -2,6 +2,8 @@
 
 # Define a porta ou usa 8080 como padrão
 PORT=${1:-8080}
+# Modelo do servidor: "threads" (padrão) ou "async" (loop de eventos asyncio)
+MODE=${2:-threads}
 
 # Função para ativar venv de forma portátil
 activate_venv() {
@@ -26,5 +28,10 @@ else
   activate_venv
 fi
 
-echo "Iniciando servidor HTTP na porta $PORT..."
-python -m app.server --port $PORT
\ No newline at end of file
+if [ "$MODE" = "async" ]; then
+  echo "Iniciando servidor HTTP (asyncio) na porta $PORT..."
+  python -m app.server_async --port $PORT
+else
+  echo "Iniciando servidor HTTP na porta $PORT..."
+  python -m app.server --port $PORT
+fi
\ No newline at end of file
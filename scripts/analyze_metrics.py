@@ -3,16 +3,75 @@
 import csv
 from collections import Counter
 
+# pandas é opcional: sem ele, o CSV é lido linha a linha com o módulo csv
+try:
+  import pandas as pd
+except ImportError:
+  pd = None
+
 METRICS_FILE = "metrics/requests.csv"
 
+# Únicas colunas usadas no resumo, com tipos compactos (category/float32 em vez de object/float64)
+_COLUMNS = ["status", "response_time_ms", "bytes_sent", "cache_status"]
+_DTYPES = {"status": "category", "response_time_ms": "float32", "bytes_sent": "int64", "cache_status": "category"}
+
+def _summarize_pandas(path):
+  """Calcula o resumo com operações vetorizadas do pandas (laços em C, não em Python)."""
+  df = pd.read_csv(path, usecols=_COLUMNS, dtype=_DTYPES)
+  if df.empty:
+    return None
+  latencies = df["response_time_ms"]
+  return {
+    "total_requests": len(df),
+    "status_counts": {str(k): int(v) for k, v in df["status"].value_counts(sort=False).items() if v},
+    "avg_latency": float(latencies.mean()),
+    "max_latency": float(latencies.max()),
+    "cache_statuses": {str(k): int(v) for k, v in df["cache_status"].value_counts(sort=False).items() if v},
+    "total_bytes": int(df["bytes_sent"].sum()),
+  }
+
+def _summarize_csv(path):
+  """Calcula o resumo em uma única passada pelo CSV, sem guardar as linhas em memória."""
+  total_requests = 0
+  latency_sum = 0.0
+  max_latency = float("-inf")
+  total_bytes = 0
+  status_counts = Counter()
+  cache_statuses = Counter()
+
+  with open(path, 'r', newline='') as f:
+    reader = csv.reader(f)
+    header = next(reader, None)
+    if header is None:
+      return None
+    i_status, i_latency, i_bytes, i_cache = (header.index(name) for name in _COLUMNS)
+    for row in reader:
+      total_requests += 1
+      status_counts[row[i_status]] += 1
+      latency = float(row[i_latency])
+      latency_sum += latency
+      if latency > max_latency:
+        max_latency = latency
+      total_bytes += int(row[i_bytes])
+      cache_statuses[row[i_cache]] += 1
+
+  if not total_requests:
+    return None
+  return {
+    "total_requests": total_requests,
+    "status_counts": status_counts,
+    "avg_latency": latency_sum / total_requests,
+    "max_latency": max_latency,
+    "cache_statuses": cache_statuses,
+    "total_bytes": total_bytes,
+  }
+
 def analyze_metrics():
   """
   Lê o arquivo de métricas e imprime um resumo das estatísticas.
   """
   try:
-    with open(METRICS_FILE, 'r') as f:
-      reader = csv.DictReader(f)
-      records = list(reader)
+    summary = (_summarize_pandas if pd is not None else _summarize_csv)(METRICS_FILE)
   except FileNotFoundError:
     print(f"Erro: Arqvuivo de métricas '{METRICS_FILE}' não encontrado.")
     return
@@ -20,29 +79,27 @@ def analyze_metrics():
     print(f"Erro ao ler o arquivo de métricas: {e}")
     return
   
-  if not records:
+  if summary is None:
     print("Nenhum registro de métricas encontrado.")
     return
   
   # --- Cálculos ---
-  total_requests = len(records)
-
-  status_counts = Counter(r['status'] for r in records)
+  total_requests = summary["total_requests"]
+  status_counts = summary["status_counts"]
 
   # Latências (tempos de resposta)
-  latencies = [float(r['response_time_ms']) for r in records]
-  avg_latency = sum(latencies) / len(latencies)
-  max_latency = max(latencies)
+  avg_latency = summary["avg_latency"]
+  max_latency = summary["max_latency"]
 
   # Cache
-  cache_statuses = Counter(r['cache_status'] for r in records)
+  cache_statuses = summary["cache_statuses"]
   cache_hits = cache_statuses.get("HIT", 0) + cache_statuses.get("CONDITIONAL_HIT", 0)
   cache_misses = cache_statuses.get("MISS", 0)
   total_cache_lookups = cache_hits + cache_misses
   hit_rate = (cache_hits / total_cache_lookups * 100) if total_cache_lookups > 0 else 0
 
   # Total de dados transferidos
-  total_bytes = sum(int(r['bytes_sent']) for r in records)
+  total_bytes = summary["total_bytes"]
 
   # --- Impressão do Resumo ---
   print("--- Análise de Métricas do Servidor ---")
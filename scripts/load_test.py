@@ -1,38 +1,165 @@
 # scripts/load_test.py
 
 import argparse
+import asyncio
 import csv
+import queue
+import threading
 import time
-import requests
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import urllib3
 
-def make_request(session, url):
+# aiohttp é opcional: com ele, os clientes são corrotinas em um único loop asyncio;
+# sem ele, cada cliente é uma thread, e todas compartilham um urllib3.PoolManager
+try:
+  import aiohttp
+except ImportError:
+  aiohttp = None
+
+_NS_PER_MS = 1_000_000
+
+# Resultados entregues em lotes: cada thread cliente envia listas de até RESULT_BATCH
+# resultados pela fila, e a linha de progresso é reescrita uma vez por lote
+RESULT_BATCH = 64
+
+def _print_progress(done, total_requests):
+  """Atualiza a linha de progresso a cada RESULT_BATCH resultados e no último."""
+  if done % RESULT_BATCH == 0 or done == total_requests:
+    print(f"Progresso: {done}/{total_requests}", end='\r')
+
+def _connection_pool(num_clients):
+  """
+  Cria o pool de conexões keep-alive dos clientes com threads: uma conexão por
+  cliente. O urllib3 direto evita as camadas do requests (Session, PreparedRequest,
+  hooks, cookies) em cada requisição.
   """
-  Realiza uma única requisição HTTP e mede sua latência.
+  return urllib3.PoolManager(
+    num_pools=1, maxsize=num_clients, block=True,
+    retries=False, timeout=urllib3.Timeout(total=10)
+  )
+
+def make_request(pool, url):
+  """
+  Realiza uma única requisição HTTP e mede sua latência até o primeiro byte do corpo.
+
+  O restante do corpo é lido fora da medição, só para devolver a conexão ao pool
+  pronta para a próxima requisição (keep-alive): em arquivos grandes, a latência
+  reflete o servidor, e não o tempo de transferência.
   
   Returns:
     tuple: (latency_mds, status_code, sucess)
   """
-  start_time = time.perf_counter()
+  # Relógio em nanossegundos inteiros: sem perda de precisão na subtração;
+  # a conversão para ms acontece uma única vez, ao montar o resultado
+  start_time = time.perf_counter_ns()
   try:
-    with session.get(url, timeout=10) as response:
-      latency = time.perf_counter() - start_time
-      return (latency * 1000, response.status_code, True)
-  except requests.RequestException as e:
-    latency = time.perf_counter() - start_time
-    return (latency * 1000, None, False)
-  
-def run_load_test(url, num_clients, requests_per_client):
+    response = pool.request("GET", url, preload_content=False)
+    response.read(1)
+    latency_ns = time.perf_counter_ns() - start_time
+    response.drain_conn()
+    response.release_conn()
+    return (latency_ns / _NS_PER_MS, response.status, True)
+  except urllib3.exceptions.HTTPError:
+    latency_ns = time.perf_counter_ns() - start_time
+    return (latency_ns / _NS_PER_MS, None, False)
+
+async def make_request_async(session, url):
+  """Versão assíncrona de make_request (latência até o primeiro byte), com uma aiohttp.ClientSession."""
+  start_time = time.perf_counter_ns()
+  try:
+    async with session.get(url) as response:
+      await response.content.read(1)
+      latency_ns = time.perf_counter_ns() - start_time
+      # Lê o restante fora da medição: uma resposta incompleta fecharia a conexão
+      await response.read()
+    return (latency_ns / _NS_PER_MS, response.status, True)
+  except (aiohttp.ClientError, asyncio.TimeoutError):
+    latency_ns = time.perf_counter_ns() - start_time
+    return (latency_ns / _NS_PER_MS, None, False)
+
+async def _run_requests_async(url, num_clients, requests_per_client, on_result):
+  """
+  Roda os clientes como corrotinas que compartilham uma aiohttp.ClientSession
+  (pool de conexões keep-alive). Cada cliente faz suas requisições em sequência,
+  então nunca há mais que num_clients requisições em andamento.
+  """
+  connector = aiohttp.TCPConnector(limit=num_clients, limit_per_host=num_clients, ttl_dns_cache=300)
+  timeout = aiohttp.ClientTimeout(total=10)
+  total_requests = num_clients * requests_per_client
+  done = 0
+
+  async def client(session):
+    nonlocal done
+    for _ in range(requests_per_client):
+      on_result(await make_request_async(session, url))
+      done += 1
+      _print_progress(done, total_requests)
+
+  async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+    await asyncio.gather(*(client(session) for _ in range(num_clients)))
+
+def _run_requests_threaded(url, num_clients, requests_per_client, on_result):
+  """
+  Roda cada cliente em uma thread própria, fazendo suas requisições em sequência
+  por um pool de conexões compartilhado. Os resultados voltam em lotes por uma única fila e são
+  entregues a on_result pela thread chamadora, então on_result não precisa ser thread-safe.
+  """
+  total_requests = num_clients * requests_per_client
+  # SimpleQueue: fila em C, sem o controle de tarefas (task_done/join) do queue.Queue
+  results = queue.SimpleQueue()
+
+  pool = _connection_pool(num_clients)
+
+  def client():
+    batch = []
+    posted = 0
+    try:
+      for _ in range(requests_per_client):
+        batch.append(make_request(pool, url))
+        if len(batch) == RESULT_BATCH:
+          results.put(batch)
+          posted += len(batch)
+          batch = []
+    except Exception as e:
+      print(f"\nERRO: Cliente de carga interrompido: {e}")
+    finally:
+      # Requisições não realizadas contam como falhas: o coletor espera exatamente
+      # total_requests resultados e, sem elas, ficaria bloqueado para sempre
+      batch.extend([(0.0, None, False)] * (requests_per_client - posted - len(batch)))
+      results.put(batch)
+
+  clients = [
+    threading.Thread(target=client, name=f"load-client-{i}", daemon=True)
+    for i in range(num_clients)
+  ]
+  for thread in clients:
+    thread.start()
+
+  # Coleta os lotes conforme eles ficam prontos
+  done = 0
+  while done < total_requests:
+    batch = results.get()
+    for result in batch:
+      on_result(result)
+    done += len(batch)
+    _print_progress(done, total_requests)
+
+  for thread in clients:
+    thread.join()
+  pool.clear()
+
+def run_load_test(url, num_clients, requests_per_client, on_result=None):
   """
   Executa o teste de carga com clientes concorrentes.
   
   Args:
     url (str): A URL a ser testada.
-    num_clients (int): O número de clientes concorrentes (threads).
+    num_clients (int): O número de clientes concorrentes (corrotinas, ou threads sem aiohttp).
     requests_per_client (int): O número de requisições que cada cliente fará.
+    on_result (callable): Opcional. Recebe cada resultado assim que ele fica pronto
+      (ex.: csv.writer.writerow), sem que os resultados sejam acumulados em memória.
     
   Returns:
-    list: Uma lista de tuplas com os resultados de cada requisição.
+    list: Uma lista de tuplas com os resultados de cada requisição, ou None com on_result.
   """
   total_requests = num_clients * requests_per_client
   print(f"Iniciando teste de carga em {url}")
@@ -40,34 +167,41 @@ def run_load_test(url, num_clients, requests_per_client):
   print(f"Requisições por cliente: {requests_per_client}")
   print(f"Total de requisições: {total_requests}\n")
 
-  results = []
+  results = None
+  if on_result is None:
+    results = []
+    on_result = results.append
 
-  # Usamos um ThreadPoolExecutor para gerenciar os clientes concorrentes
-  with ThreadPoolExecutor(max_workers=num_clients) as executor:
-    # Usamos uma sessão por cliente para reutilização de conexão (similar ao keep-alive)
-    sessions = [requests.Session() for _ in range(num_clients)]
-
-    futures = []
-    for i in range(total_requests):
-      session = sessions[i % num_clients]
-      futures.append(executor.submit(make_request, session, url))
-
-    # Coleta os resultados conforme eles ficam prontos
-    for i, future in enumerate(as_completed(futures)):
-      results.append(future.result())
-      print(f"Progresso: {i + 1}/{total_requests}", end='\r')
+  if aiohttp is not None:
+    asyncio.run(_run_requests_async(url, num_clients, requests_per_client, on_result))
+  else:
+    _run_requests_threaded(url, num_clients, requests_per_client, on_result)
 
   print("\nTeste de carga concluído.\n")
   return results
 
+RESULTS_HEADER = ["latency_ms", "status_code", "success"]
+
+def open_results_csv(filepath):
+  """
+  Abre o CSV de resultados e escreve o cabeçalho.
+
+  Returns:
+    tuple: (arquivo aberto, csv.writer) para gravar as linhas conforme chegam.
+  """
+  # Buffer de 1 MiB: em testes longos, as linhas saem em poucas chamadas de write
+  f = open(filepath, 'w', newline='', encoding='utf-8', buffering=1 << 20)
+  writer = csv.writer(f)
+  writer.writerow(RESULTS_HEADER)
+  return f, writer
+
 def save_results_to_csv(results, filepath):
   """
   Salva os resultados do teste de carga em um arquivo CSV.
   """
   print(f"Salvando resultados em '{filepath}'...")
-  with open(filepath, 'w', newline='') as f:
-    writer = csv.writer(f)
-    writer.writerow(["latency_ms", "status_code", "success"])
+  f, writer = open_results_csv(filepath)
+  with f:
     writer.writerows(results)
   print("Resultados salvos com sucesso.\n")
 
@@ -82,11 +216,14 @@ if __name__ == "__main__":
 
   target_url = f"http://localhost:{args.port}{args.path}"
 
-  test_results = run_load_test(target_url, args.clients, args.requests_per_client)
-
   # Garante que o diretório de resultados exista
   import os
   os.makedirs("results", exist_ok=True)
 
+  # Cada resultado é gravado assim que fica pronto: a memória não cresce com o total
   output_filepath = "results/load_test_results.csv"
-  save_results_to_csv(test_results, output_filepath)
\ No newline at end of file
+  print(f"Salvando resultados em '{output_filepath}' durante o teste...")
+  f, writer = open_results_csv(output_filepath)
+  with f:
+    run_load_test(target_url, args.clients, args.requests_per_client, writer.writerow)
+  print("Resultados salvos com sucesso.\n")
\ No newline at end of file
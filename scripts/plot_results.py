@@ -2,42 +2,103 @@
 
 import argparse
 import csv
+import glob
+from concurrent.futures import ProcessPoolExecutor
+import matplotlib
+# Backend não interativo: o script só grava PNGs, sem inicializar um toolkit gráfico (Tk)
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
+import numpy as np
 import os
+import warnings
 
 # --- Diretórios de Dados e Saída ---
 RESULTS_DIR = "results"
 METRICS_FILE = "metrics/requests.csv"
 LOAD_TEST_FILE = "results/load_test_results.csv"
 
+# Percentis marcados no histograma de latências, com a cor de cada linha
+LATENCY_PERCENTILES = (50, 90, 99, 99.9)
+PERCENTILE_COLORS = ('g', 'y', 'orange', 'purple')
+
 # Garante que o diretório de resultados exista
 os.makedirs(RESULTS_DIR, exist_ok=True)
 
+def load_columns(filepath, dtypes):
+  """
+  Carrega colunas de um CSV com cabeçalho em um array estruturado do NumPy.
+
+  As colunas são localizadas pelo nome no cabeçalho; a leitura das linhas é
+  feita pelo parser em C do np.loadtxt, sem um objeto Python por célula.
+  O resultado é guardado ao lado do CSV em um arquivo .npy cujo nome carrega o
+  tamanho e o mtime (em ns) do CSV: qualquer escrita no CSV, mesmo dentro do
+  mesmo tique do relógio, muda a chave e invalida o cache.
+
+  Args:
+    filepath (str): Caminho do CSV.
+    dtypes (list): Pares (nome da coluna, dtype do NumPy).
+  """
+  stat = os.stat(filepath)  # FileNotFoundError para o chamador
+  cache_prefix = f"{filepath}.{'-'.join(name for name, _ in dtypes)}."
+  cache_path = f"{cache_prefix}{stat.st_size}-{stat.st_mtime_ns}.npy"
+  try:
+    cached = np.load(cache_path)
+    if cached.dtype == np.dtype(dtypes):
+      return cached
+  except (OSError, ValueError):
+    pass  # Sem cache, cache ilegível ou salvo com outros tipos: lê o CSV
+
+  with open(filepath, 'r', newline='') as f:
+    header = next(csv.reader(f), [])
+    usecols = [header.index(name) for name, _ in dtypes]
+    # ndmin=1: um arquivo com uma única linha ainda vira um array. Um arquivo só com
+    # o cabeçalho vira um array vazio; o aviso do NumPy nesse caso é silenciado
+    with warnings.catch_warnings():
+      warnings.simplefilter("ignore", UserWarning)
+      rows = np.loadtxt(f, delimiter=',', usecols=usecols, dtype=dtypes, ndmin=1)
+
+  try:
+    np.save(cache_path, rows)
+  except OSError as e:
+    print(f"Aviso: não foi possível salvar o cache '{cache_path}': {e}")
+    return rows
+  # Remove os caches das versões anteriores do CSV
+  for stale in glob.glob(f"{glob.escape(cache_prefix)}*.npy"):
+    if stale != cache_path:
+      try:
+        os.remove(stale)
+      except OSError:
+        pass
+  return rows
+
 def plot_latency_histogram():
   """Gera um histograma de latências a partir do resultado do teste de carga"""
   try:
-    latencies = []
-    with open(LOAD_TEST_FILE, 'r') as f:
-      reader = csv.DictReader(f)
-      for row in reader:
-        if row['success'].lower() == 'true':
-          latencies.append(float(row['latency_ms']))
+    rows = load_columns(LOAD_TEST_FILE, [('latency_ms', 'f8'), ('success', 'U5')])
   except FileNotFoundError:
     print(f"Erro: Arquivo de teste de carga '{LOAD_TEST_FILE}' não encontrado.")
     return
+  latencies = rows['latency_ms'][np.char.lower(rows['success']) == 'true']
   
-  if not latencies:
+  if not latencies.size:
     print("Nenhum dado de latência disponível para plotar.")
     return
   
+  # Agrupa as latências nas classes com o NumPy e desenha só as barras prontas
+  counts, edges = np.histogram(latencies, bins=50)
   plt.figure(figsize=(10, 6))
-  plt.hist(latencies, bins=50, edgecolor='black')
+  plt.bar(edges[:-1], counts, width=np.diff(edges), align='edge', edgecolor='black')
   plt.title("Distribuição das Latências de Requisição")
   plt.xlabel("Latência (ms)")
   plt.ylabel("Frequência")
 
-  avg_latency = sum(latencies) / len(latencies)
+  avg_latency = latencies.mean()
   plt.axvline(avg_latency, color='r', linestyle='dashed', linewidth=2, label=f'Média: {avg_latency:.2f} ms')
+
+  # Percentis de cauda em uma única chamada (uma só ordenação parcial do array)
+  values = np.percentile(latencies, LATENCY_PERCENTILES)
+  for pct, value, color in zip(LATENCY_PERCENTILES, values, PERCENTILE_COLORS):
+    plt.axvline(value, color=color, linestyle='dotted', linewidth=2, label=f'p{pct:g}: {value:.2f} ms')
   plt.legend()
 
   output_path = os.path.join(RESULTS_DIR, "latency_histogram.png")
@@ -48,22 +109,19 @@ def plot_latency_histogram():
 def plot_cache_hit_ratio():
   """Gera um gráfico de pizza da taxa de acerto do cache a partir das métricas do servidor."""
   try:
-    statuses = []
-    with open(METRICS_FILE, 'r') as f:
-      reader = csv.DictReader(f)
-      for row in reader:
-        statuses.append(row['cache_status'])
+    statuses = load_columns(METRICS_FILE, [('cache_status', 'U16')])['cache_status']
   except FileNotFoundError:
     print(f"Erro: Arquivo de métricas '{METRICS_FILE}' não encontrado.")
     return
   
-  if not statuses:
+  if not statuses.size:
     print("Nenhum dado de status de cache disponível para plotar.")
     return
   
-  # Conta as ocorrências de cada status
-  cache_hits = statuses.count("HIT") + statuses.count("CONDITIONAL_HIT")
-  cache_misses = statuses.count("MISS")
+  # Conta só os status usados no gráfico, com comparações vetorizadas: sem ordenar
+  # o array (como np.unique faria) nem contar os status que não entram na pizza
+  cache_hits = int(np.count_nonzero(statuses == "HIT") + np.count_nonzero(statuses == "CONDITIONAL_HIT"))
+  cache_misses = int(np.count_nonzero(statuses == "MISS"))
 
   if cache_hits + cache_misses == 0:
     print("Nenhum dado de cache HIT ou MISS registrado.")
@@ -86,11 +144,19 @@ def plot_cache_hit_ratio():
 
 if __name__ == "__main__":
   parser = argparse.ArgumentParser(description="Gera gráficos a partir dos resultados de benchmark.")
-  parser.add_argument("plot_type", choices=['latency', 'cache'], help="O tipo de gráfico a ser gerado.")
+  parser.add_argument("plot_type", nargs='?', default='all', choices=['latency', 'cache', 'all'],
+                      help="O tipo de gráfico a ser gerado (padrão: all, os dois em paralelo, um processo cada).")
   
   args = parser.parse_args()
   
   if args.plot_type == 'latency':
       plot_latency_histogram()
   elif args.plot_type == 'cache':
-      plot_cache_hit_ratio()
\ No newline at end of file
+      plot_cache_hit_ratio()
+  else:
+      # Os gráficos são independentes (arquivos e figuras diferentes): cada um é
+      # gerado em um processo. No Linux (fork), os filhos herdam o matplotlib já importado
+      with ProcessPoolExecutor(max_workers=2) as executor:
+        futures = [executor.submit(plot_latency_histogram), executor.submit(plot_cache_hit_ratio)]
+        for future in futures:
+          future.result()
\ No newline at end of file
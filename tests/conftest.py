@@ -0,0 +1,124 @@
+# tests/conftest.py
+
+import os
+import pytest
+import shutil
+import socket
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from app import server
+from app.server import main as start_server, create_listen_socket
+from app.server_async import main as start_async_server
+from app import config
+
+SERVER_URL = f"http://127.0.0.1:{config.PORT}"
+ASYNC_SERVER_PORT = config.PORT + 1
+ASYNC_SERVER_URL = f"http://127.0.0.1:{ASYNC_SERVER_PORT}"
+
+# Diretório em memória (tmpfs) usado como raiz do tmp_path, quando disponível
+SHM_DIR = "/dev/shm"
+# Raiz criada em SHM_DIR por pytest_configure, guardada no stash do pytest
+SHM_BASETEMP_KEY = pytest.StashKey[str]()
+
+def pytest_addoption(parser):
+  """Opção --perf: os testes de carga (marcados com perf) ficam fora da suíte rápida."""
+  parser.addoption("--perf", action="store_true", default=False, help="roda também os testes marcados com perf")
+
+def pytest_configure(config):
+  """
+  Registra a marca perf e coloca a raiz do tmp_path em /dev/shm quando não há
+  --basetemp: as pastas web dos testes (inclusive os arquivos grandes do
+  streaming) ficam em memória, sem I/O de disco na escrita nem no stat/open/sendfile
+  do servidor.
+  """
+  config.addinivalue_line("markers", "perf: teste de carga, só roda com --perf")
+  if config.option.basetemp is None and os.access(SHM_DIR, os.W_OK):
+    config.option.basetemp = tempfile.mkdtemp(prefix="pytest-", dir=SHM_DIR)
+    config.stash[SHM_BASETEMP_KEY] = config.option.basetemp
+
+def pytest_unconfigure(config):
+  """Remove a raiz em /dev/shm criada por pytest_configure: ela ocupa memória, não disco."""
+  basetemp = config.stash.get(SHM_BASETEMP_KEY, None)
+  if basetemp:
+    shutil.rmtree(basetemp, ignore_errors=True)
+
+def pytest_collection_modifyitems(config, items):
+  """Pula os testes marcados com perf, a menos que a suíte rode com --perf."""
+  if config.getoption("--perf"):
+    return
+  skip_perf = pytest.mark.skip(reason="teste de carga: use --perf para rodar")
+  for item in items:
+    if "perf" in item.keywords:
+      item.add_marker(skip_perf)
+
+def open_client(port, timeout=2):
+  """
+  Abre uma conexão TCP crua com o servidor local, com TCP_NODELAY como o requests
+  já faz: escritas pequenas seguidas não esperam o ACK atrasado do servidor.
+  """
+  sock = socket.create_connection(("127.0.0.1", port), timeout=timeout)
+  sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+  return sock
+
+def start_server_thread(target, port):
+  """
+  Inicia um servidor em uma thread daemon com o socket de escuta criado aqui.
+
+  O bind e o listen terminam antes de a thread começar, então as conexões dos
+  testes já entram no backlog: não há espera nem sondagem da porta. Retorna o
+  socket de escuta (um shutdown nele encerra o loop de accept do servidor).
+  """
+  sock = create_listen_socket(config.HOST, port)
+  threading.Thread(target=target, args=(config.HOST, port), kwargs={"sock": sock}, daemon=True).start()
+  return sock
+
+@pytest.fixture(scope="session")
+def threaded_server():
+  """
+  Inicia o servidor com threads uma única vez por sessão de testes. O servidor lê
+  config.WWW_ROOT a cada requisição, então cada teste aponta para sua própria pasta.
+  """
+  start_server_thread(start_server, config.PORT)
+  return SERVER_URL
+
+@pytest.fixture(scope="session")
+def async_server():
+  """Inicia o servidor asyncio uma única vez por sessão de testes, em outra porta."""
+  start_server_thread(start_async_server, ASYNC_SERVER_PORT)
+  return ASYNC_SERVER_URL
+
+class SubmittedConnections:
+  """Conexões entregues ao pool do servidor com threads: os sockets, na ordem de entrega."""
+
+  def __init__(self):
+    self.sockets = []
+    self._ready = threading.Semaphore(0)
+
+  def record(self, client_socket):
+    self.sockets.append(client_socket)
+    self._ready.release()
+
+  def wait(self, timeout=2):
+    """Espera a próxima conexão ocupar sua vaga no pool (em atendimento ou na fila)."""
+    return self._ready.acquire(timeout=timeout)
+
+@pytest.fixture
+def submitted_connections(monkeypatch):
+  """
+  Troca o pool do servidor com threads (iniciado depois da fixture) por um que
+  registra cada conexão entregue: o teste espera por estado explícito, em vez de
+  dormir. A referência guardada também impede que o coletor de lixo feche um
+  socket que o próprio servidor deveria fechar.
+  """
+  submitted = SubmittedConnections()
+
+  class SignallingPool(ThreadPoolExecutor):
+    def submit(self, fn, client_socket, *args, **kwargs):
+      future = super().submit(fn, client_socket, *args, **kwargs)
+      submitted.record(client_socket)
+      return future
+
+  monkeypatch.setattr(server, "ThreadPoolExecutor", SignallingPool)
+  return submitted
\ No newline at end of file
@@ -1,9 +1,9 @@
 # tests/test_cache.py
 
 import pytest
-import time
 import threading
-from app.cache import LRUCache
+from app import cache as app_cache
+from app.cache import LRUCache, ShardedLRUCache
 
 @pytest.fixture
 def cache():
@@ -20,10 +20,12 @@ def test_cache_miss(cache):
   """Testa o comportamento de cache miss."""
   assert cache.get("non_existent_key") is None
 
-def test_cache_expiration(cache):
+def test_cache_expiration(cache, monkeypatch):
   """Testa se o item expira corretamente após o TTL."""
   cache.set("key_exp", b"value_exp", ttl_seconds=0.1)
-  time.sleep(0.2)  # Espera o TTL expirar
+  # Adianta o relógio monotônico do cache em vez de dormir até o TTL expirar
+  now = app_cache._mono()
+  monkeypatch.setattr(app_cache, "_mono", lambda: now + 0.2)
   assert cache.get("key_exp") is None
 
 def test_cache_invalidate(cache):
@@ -74,13 +76,23 @@ def test_eviction_by_max_bytes(cache):
   assert cache.get("small") is not None
   assert cache.stats()['current_bytes'] == 60  # 50 + 10
 
+def test_explicit_size_bytes(cache):
+  """Testa se um size_bytes explícito é o tamanho contabilizado para valores arbitrários."""
+  cache.set("obj", object(), 10, size_bytes=70)
+  assert cache.stats()['current_bytes'] == 70
+
+  # Ultrapassa o limite de 100 bytes: o item mais antigo é removido
+  cache.set("obj2", object(), 10, size_bytes=40)
+  assert cache.get("obj") is None
+  assert cache.stats()['current_bytes'] == 40
+
 def test_lru_order_is_updated_on_get(cache):
   """Testa se um GET em um item o torna o mais recentemente usado."""
   cache.set("k1", b"v1", 10) # Mais antigo
   cache.set("k2", b"v2", 10)
 
-  # Acessa k1 para torná-lo o mais recentemente usado
-  time.sleep(0.1)  # Garante que o tempo mude
+  # Acessa k1 para torná-lo o mais recentemente usado (o S3-FIFO marca o acesso
+  # no contador do item, sem depender do relógio)
   cache.get("k1")
 
   cache.set("k3", b"v3", 10) # Cache cheio agora
@@ -91,4 +103,102 @@ def test_lru_order_is_updated_on_get(cache):
   assert cache.get("k2") is None  # k2 deve ter sido removido
   assert cache.get("k1") is not None
   assert cache.get("k3") is not None
-  assert cache.get("k4") is not None
\ No newline at end of file
+  assert cache.get("k4") is not None
+
+def test_scan_does_not_evict_hot_items():
+  """Testa se uma varredura de chaves acessadas uma única vez preserva os itens populares."""
+  cache = LRUCache(max_items=10, max_bytes=10_000)
+  for i in range(5):
+    cache.set(f"hot{i}", b"h", 10)
+    cache.get(f"hot{i}")
+
+  # Varredura (ex.: crawler) muito maior que o cache
+  for i in range(100):
+    cache.set(f"scan{i}", b"s", 10)
+
+  for i in range(5):
+    assert cache.get(f"hot{i}") is not None
+  assert cache.stats()['current_items'] == 10
+
+def test_ghost_key_is_readmitted_to_main():
+  """Uma chave removida há pouco e reinserida entra direto na fila principal."""
+  cache = LRUCache(max_items=10, max_bytes=10_000)
+  cache.set("volta", b"v", 10)
+  for i in range(12):
+    cache.set(f"scan{i}", b"s", 10)
+  assert cache.get("volta") is None  # Removida sem acesso (chave fica na ghost)
+
+  cache.set("volta", b"v", 10)       # Reinserida: vai para a main
+  for i in range(20, 40):
+    cache.set(f"scan{i}", b"s", 10)
+  assert cache.get("volta") is not None
+
+def test_cache_thread_safety():
+  """Testa leituras e escritas concorrentes sob o lock de leitura/escrita."""
+  cache = LRUCache(max_items=50, max_bytes=10_000)
+  errors = []
+
+  def worker(thread_id):
+    try:
+      for i in range(200):
+        key = f"k{(thread_id + i) % 80}"
+        cache.set(key, {'content': b"x" * 10, 'etag': key}, 10)
+        value = cache.get(key)
+        assert value is None or value['etag'] == key
+    except Exception as e:
+      errors.append(e)
+
+  threads = [threading.Thread(target=worker, args=(i,)) for i in range(20)]
+  for thread in threads:
+    thread.start()
+  for thread in threads:
+    thread.join()
+
+  assert not errors
+  stats = cache.stats()
+  assert stats['current_items'] <= 50
+  assert stats['current_bytes'] == stats['current_items'] * 10
+
+def test_get_hit_does_not_wait_for_writers():
+  """Testa se um hit é servido mesmo com o lock de escrita ocupado por outra thread."""
+  cache = LRUCache(max_items=10, max_bytes=1000)
+  cache.set("k1", b"v1", 10)
+  results = []
+
+  with cache._rwlock.write():
+    reader = threading.Thread(target=lambda: results.append(cache.get("k1")))
+    reader.start()
+    reader.join(timeout=2)
+    assert not reader.is_alive()
+
+  assert results == [b"v1"]
+  assert cache.stats()['hits'] == 1
+
+
+# --- Testes para o cache particionado (shards) ---
+
+def test_sharded_cache_set_get_and_stats():
+  """Testa se o cache particionado encaminha as chaves e agrega as estatísticas."""
+  cache = ShardedLRUCache(max_items=40, max_bytes=4000, num_shards=4)
+  for i in range(10):
+    cache.set(f"k{i}", b"v" * 10, 10)
+
+  for i in range(10):
+    assert cache.get(f"k{i}") == b"v" * 10
+  assert cache.get("missing") is None
+
+  cache.invalidate("k0")
+  assert cache.get("k0") is None
+
+  stats = cache.stats()
+  assert stats['shards'] == 4
+  assert stats['hits'] == 10
+  assert stats['misses'] == 2
+  assert stats['current_items'] == 9
+  assert stats['current_bytes'] == 90
+  assert stats['max_items'] == 40
+
+def test_sharded_cache_requires_power_of_two():
+  """O número de shards deve ser potência de 2 para o mascaramento do hash."""
+  with pytest.raises(ValueError):
+    ShardedLRUCache(max_items=30, max_bytes=3000, num_shards=3)
@@ -1,24 +1,31 @@
 # tests/test_integration.py
 
+import asyncio
+import http.client
 import pytest
 import requests
-import threading
+import socket
 import time
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 # Importa a função main do servidor para rodá-lo em um thread separado
 from app.server import main as start_server
 from app import config
+from tests.conftest import open_client, start_server_thread
 
 # --- Configuração do Teste ---
-SERVER_URL = f"http://127.0.0.1:{config.PORT}"
 TEST_FILE_CONTENT = "<html><body>Test Content</body></html>"
+PERF_CLIENTS = 16                  # Clientes simultâneos do teste de carga
+PERF_REQUESTS = 1000               # Total de requisições do teste de carga
+PERF_MIN_REQUESTS_PER_SECOND = 300 # Vazão mínima esperada; um servidor serializado fica bem abaixo
 
 # A fixture agora aceita 'tmp_path' e 'monkeypatch' como argumentos
 @pytest.fixture
-def running_server(tmp_path, monkeypatch):
+def running_server(tmp_path, monkeypatch, threaded_server):
   """
-  Fixture que inicia o servidor em uma thread separada pra os testes de integração.
+  Fixture que prepara a pasta web de um teste de integração e devolve a URL do
+  servidor com threads (iniciado uma vez por sessão, em conftest.py).
   """
   # 1. Cria o diretório web temporário para testes
   test_www_dir = tmp_path / "www"
@@ -37,13 +44,20 @@ def running_server(tmp_path, monkeypatch):
   global TEST_FILE_PATH
   TEST_FILE_PATH = str(test_file)
 
-  # Inicia o servidor em uma thread separada
-  server_thread = threading.Thread(target=start_server, args=(config.HOST, config.PORT), daemon=True)
-  server_thread.start()
-  time.sleep(0.5)  # Dá um tempo pro servidor iniciar
-
   # 'yield' passa o controle para os testes
-  yield SERVER_URL
+  yield threaded_server
+
+def assert_not_modified(response):
+  """
+  Verifica um 304 obtido com stream=True: sem corpo e sem Content-Length diferente
+  de zero (RFC 7232), e fecha a resposta sem passar pela decodificação do conteúdo.
+  """
+  try:
+    assert response.status_code == 304
+    assert int(response.headers.get("Content-Length", "0")) == 0
+    assert response.raw.read() == b""
+  finally:
+    response.close()
 
 def test_conditional_get_with_etag(running_server):
   """
@@ -51,19 +65,63 @@ def test_conditional_get_with_etag(running_server):
   """
   url = f"{running_server}/index.html"
 
-  # 1. Primeira requisição para obter a ETag
-  response1 = requests.get(url)
-  assert response1.status_code == 200
-  assert "ETag" in response1.headers
-  etag = response1.headers["ETag"]
+  # Mesma conexão (keep-alive) para as duas requisições, como um navegador
+  with requests.Session() as session:
+    # 1. Primeira requisição para obter a ETag
+    response1 = session.get(url)
+    assert response1.status_code == 200
+    assert "ETag" in response1.headers
+    etag = response1.headers["ETag"]
+
+    # 2. SEgunda requisição com cabeçalho If-None-Match
+    headers = {"If-None-Match": etag}
+    response2 = session.get(url, headers=headers, stream=True)
+
+    # Verifica se a resposta foi 304 e o corpo está vazio
+    assert_not_modified(response2)
+
+# Formas de If-None-Match da RFC 7232: (valor do cabeçalho, status esperado)
+CONDITIONAL_CASES = [
+  (None, 200),
+  ("{etag}", 304),
+  ("{strong}", 304),   # Mesma ETag sem o prefixo W/ (comparação fraca)
+  ("*", 304),
+  ('"errada", {etag}', 304),
+  ('"errada"', 200),
+]
 
-  # 2. SEgunda requisição com cabeçalho If-None-Match
-  headers = {"If-None-Match": etag}
-  response2 = requests.get(url, headers=headers)
+def format_if_none_match(template, etag):
+  """Preenche o modelo de If-None-Match com a ETag atual (e sua forma forte)."""
+  return template.format(etag=etag, strong=etag.removeprefix("W/"))
 
-  # Verifica se a resposta foi 304 e o corpo está vazio
-  assert response2.status_code == 304
-  assert response2.text == ""
+@pytest.mark.parametrize("if_none_match, expected_status", CONDITIONAL_CASES)
+def test_conditional_get_variants(running_server, if_none_match, expected_status):
+  """
+  Testa as formas de If-None-Match da RFC 7232 na mesma conexão keep-alive.
+
+  Usa http.client direto: só status, um cabeçalho e o corpo são verificados, e
+  cada caso parametrizado dispensa a pilha do requests (sessão, adaptador, urllib3).
+  """
+  conn = http.client.HTTPConnection("127.0.0.1", config.PORT, timeout=5)
+  try:
+    conn.request("GET", "/index.html")
+    response1 = conn.getresponse()
+    response1.read()
+    etag = response1.getheader("ETag")
+
+    headers = {}
+    if if_none_match is not None:
+      headers["If-None-Match"] = format_if_none_match(if_none_match, etag)
+    conn.request("GET", "/index.html", headers=headers)
+    response2 = conn.getresponse()
+    body = response2.read()
+  finally:
+    conn.close()
+
+  assert response2.status == expected_status
+  assert body == (b"" if expected_status == 304 else TEST_FILE_CONTENT.encode())
+  if expected_status == 304:
+    assert int(response2.getheader("Content-Length", "0")) == 0
 
 def test_conditional_get_with_last_modified(running_server):
   """
@@ -71,39 +129,59 @@ def test_conditional_get_with_last_modified(running_server):
   """
   url = f"{running_server}/index.html"
 
-  # 1. Primeira requisição para obter Last-Modified
-  response1 = requests.get(url)
-  assert response1.status_code == 200
-  assert "Last-Modified" in response1.headers
-  last_modified = response1.headers["Last-Modified"]
+  with requests.Session() as session:
+    # 1. Primeira requisição para obter Last-Modified
+    response1 = session.get(url)
+    assert response1.status_code == 200
+    assert "Last-Modified" in response1.headers
+    last_modified = response1.headers["Last-Modified"]
+
+    # 2. Segunda requisição com cabeçalho If-Modified-Since
+    headers = {"If-Modified-Since": last_modified}
+    response2 = session.get(url, headers=headers, stream=True)
+    assert_not_modified(response2)
+
+@pytest.mark.xfail(reason="o servidor ainda só implementa GET (HEAD recebe 405)", strict=True)
+def test_head_conditional(running_server):
+  """
+  Testa a validação de cache por HEAD condicional: 304 sem transferir o corpo.
+  """
+  url = f"{running_server}/index.html"
 
-  # 2. Segunda requisição com cabeçalho If-Modified-Since
-  headers = {"If-Modified-Since": last_modified}
-  response2 = requests.get(url, headers=headers)
+  with requests.Session() as session:
+    etag = session.get(url).headers["ETag"]
+    response = session.head(url, headers={"If-None-Match": etag})
 
-  assert response2.status_code == 304
-  assert response2.text == ""
+  assert response.status_code == 304
+  assert not response.content
 
-def test_modified_file_returns_200(running_server):
+def test_modified_file_returns_200(running_server, monkeypatch):
   """
   Testa se o servidor retorna 200 OK quando com o novo conteúdo quando o arquivo é modificado.
   """
+  # /index.html é um HOT_PATH: sem stat por até HOT_REVALIDATE_SECONDS. Com zero,
+  # toda requisição revalida, e o teste não precisa esperar essa janela passar
+  monkeypatch.setattr(config, "HOT_REVALIDATE_SECONDS", 0)
   url = f"{running_server}/index.html"
 
-  # 1. Primeira requisição para obter a ETag original
-  response1 = requests.get(url)
-  assert response1.status_code == 200
-  original_etag = response1.headers["ETag"]
+  with requests.Session() as session:
+    # 1. Primeira requisição para obter a ETag original
+    response1 = session.get(url)
+    assert response1.status_code == 200
+    original_etag = response1.headers["ETag"]
 
-  # 2. Modifica o arquivo no disco
-  time.sleep(1)  # Garante que o timestamp de modificação será diferente
-  new_content = "<html><body>Updated Content</body></html>"
-  with open(TEST_FILE_PATH, "w") as f:
-    f.write(new_content)
+    # 2. Modifica o arquivo no disco
+    new_content = "<html><body>Updated Content</body></html>"
+    with open(TEST_FILE_PATH, "w") as f:
+      f.write(new_content)
+    # Adianta o mtime em 1s em vez de dormir: a data de modificação muda mesmo em
+    # sistemas de arquivos com resolução de 1 segundo
+    stat = os.stat(TEST_FILE_PATH)
+    os.utime(TEST_FILE_PATH, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
 
-  # 3. Segunda requisição com o ETag ANTIGA
-  headers = {"If-None-Match": original_etag}
-  response2 = requests.get(url, headers=headers)
+    # 3. Segunda requisição com o ETag ANTIGA
+    headers = {"If-None-Match": original_etag}
+    response2 = session.get(url, headers=headers)
 
   # A rseposta deve ser 200 com o novo conteúdo, pois a ETag não coresponde mais
   assert response2.status_code == 200
@@ -115,4 +193,349 @@ def test_modified_file_returns_200(running_server):
 
   # Restaura o arquivo original para não afetar outros testes
   with open(TEST_FILE_PATH, "w") as f:
-    f.write(TEST_FILE_CONTENT)
\ No newline at end of file
+    f.write(TEST_FILE_CONTENT)
+
+def test_second_request_is_served_from_cache(running_server):
+  """
+  Testa se a primeira requisição aquece o cache (MISS) e a seguinte é um HIT com a mesma ETag.
+  """
+  with requests.Session() as session:
+    response1 = session.get(f"{running_server}/index.html")
+    response2 = session.get(f"{running_server}/index.html")
+
+  assert response1.headers["X-Cache-Status"] == "MISS"
+  assert response2.headers["X-Cache-Status"] == "HIT"
+  assert response2.headers["ETag"] == response1.headers["ETag"]
+  assert response2.text == TEST_FILE_CONTENT
+
+def test_cache_control(running_server):
+  """
+  Testa o Cache-Control: HTML sempre revalida e os demais arquivos estáticos têm
+  max-age, inclusive no 304 (que renova o prazo da cópia do cliente).
+  """
+  with open(os.path.join(config.WWW_ROOT, "estilo.css"), "w") as f:
+    f.write("body { color: black; }")
+
+  with requests.Session() as session:
+    page = session.get(f"{running_server}/index.html")
+    assert page.headers["Cache-Control"] == "no-cache"
+
+    asset = session.get(f"{running_server}/estilo.css")
+    assert asset.headers["Cache-Control"] == f"public, max-age={config.STATIC_MAX_AGE_SECONDS}"
+
+    revalidated = session.get(f"{running_server}/estilo.css", headers={"If-None-Match": asset.headers["ETag"]})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["Cache-Control"] == asset.headers["Cache-Control"]
+
+def test_range_request(running_server):
+  """
+  Testa requisições de intervalo (Range): 206 com Content-Range, If-Range com a data
+  da versão atual, com a ETag fraca e de outra versão, e 416 para um intervalo além do fim.
+  """
+  content = os.urandom(100_000)
+  filepath = os.path.join(config.WWW_ROOT, "big.bin")
+  with open(filepath, "wb") as f:
+    f.write(content)
+  # Last-Modified no passado: a forma de data do If-Range só vale se for 1 s mais antiga que o Date
+  old_mtime = time.time() - 60
+  os.utime(filepath, (old_mtime, old_mtime))
+  url = f"{running_server}/big.bin"
+
+  with requests.Session() as session:
+    full = session.get(url)
+    assert full.headers["Accept-Ranges"] == "bytes"
+
+    partial = session.get(url, headers={"Range": "bytes=0-249"})
+    assert partial.status_code == 206
+    assert partial.headers["Content-Range"] == "bytes 0-249/100000"
+    assert partial.content == content[:250]
+
+    resumed = session.get(url, headers={"Range": "bytes=99900-", "If-Range": full.headers["Last-Modified"]})
+    assert resumed.status_code == 206
+    assert resumed.content == content[99900:]
+
+    # A ETag é fraca: no If-Range ela nunca garante bytes idênticos, e o arquivo inteiro volta com 200
+    weak = session.get(url, headers={"Range": "bytes=99900-", "If-Range": full.headers["ETag"]})
+    assert weak.status_code == 200
+    assert weak.content == content
+
+    # If-Range de outra versão: o arquivo inteiro volta com 200
+    changed = session.get(url, headers={"Range": "bytes=0-249", "If-Range": '"outra"'})
+    assert changed.status_code == 200
+    assert changed.content == content
+
+    unsatisfiable = session.get(url, headers={"Range": "bytes=100000-"})
+    assert unsatisfiable.status_code == 416
+    assert unsatisfiable.headers["Content-Range"] == "bytes */100000"
+
+def test_large_file_is_streamed(running_server):
+  """
+  Testa se um arquivo acima do limiar de streaming é enviado completo (via sendfile).
+  """
+  content = os.urandom(config.STREAMING_THRESHOLD_BYTES + 12345)
+  with open(os.path.join(config.WWW_ROOT, "grande.bin"), "wb") as f:
+    f.write(content)
+
+  response = requests.get(f"{running_server}/grande.bin")
+  assert response.status_code == 200
+  assert response.headers["X-Cache-Status"] == "STREAMING"
+  assert response.content == content
+
+def test_text_file_is_served_gzipped(running_server):
+  """
+  Testa se um arquivo de texto grande é enviado comprimido para clientes que aceitam gzip.
+  """
+  content = "<p>linha de texto</p>\n" * 500
+  with open(os.path.join(config.WWW_ROOT, "texto.html"), "w") as f:
+    f.write(content)
+
+  for _ in range(2):  # MISS e depois HIT: as duas respostas usam a variante comprimida
+    response = requests.get(f"{running_server}/texto.html", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert int(response.headers["Content-Length"]) < len(content)
+    assert response.text == content  # requests descomprime automaticamente
+
+def test_cache_disabled_serves_file_via_sendfile(running_server, monkeypatch):
+  """
+  Testa se, com o cache desabilitado, o arquivo é enviado direto do disco e identificado como DISABLED.
+  """
+  monkeypatch.setattr(config, "ENABLE_CACHE", False)
+
+  response = requests.get(f"{running_server}/index.html")
+
+  assert response.status_code == 200
+  assert response.headers["X-Cache-Status"] == "DISABLED"
+  assert response.text == TEST_FILE_CONTENT
+
+def test_not_found_keeps_connection_alive(running_server):
+  """
+  Testa se, depois de um 404, a mesma conexão atende a próxima requisição.
+  """
+  with open_client(config.PORT) as sock:
+    sock.sendall(b"GET /favicon.ico HTTP/1.1\r\nHost: localhost\r\n\r\n")
+    first = sock.recv(4096)
+    assert first.startswith(b"HTTP/1.1 404 Not Found")
+    assert b"Connection: keep-alive" in first
+
+    sock.sendall(b"GET /index.html HTTP/1.1\r\nHost: localhost\r\n\r\n")
+    data = b""
+    while TEST_FILE_CONTENT.encode() not in data:
+      chunk = sock.recv(4096)
+      assert chunk, "conexão fechada depois do 404"
+      data += chunk
+  assert data.startswith(b"HTTP/1.1 200 OK")
+
+def test_oversized_request_head_is_rejected(running_server):
+  """
+  Testa se um cabeçalho maior que MAX_REQUEST_BYTES recebe 400, mesmo chegando em um único envio.
+  """
+  filler = b"X-Filler: " + b"a" * (config.MAX_REQUEST_BYTES * 2) + b"\r\n"
+  with open_client(config.PORT) as sock:
+    sock.sendall(b"GET /index.html HTTP/1.1\r\n" + filler + b"\r\n")
+    assert sock.recv(4096).startswith(b"HTTP/1.1 400 Bad Request")
+
+def test_pipelined_requests(running_server):
+  """
+  Testa se duas requisições enviadas no mesmo segmento TCP recebem duas respostas.
+  """
+  request = b"GET /index.html HTTP/1.1\r\nHost: localhost\r\n\r\n"
+  with open_client(config.PORT) as sock:
+    sock.sendall(request * 2)
+
+    data = b""
+    while data.count(TEST_FILE_CONTENT.encode()) < 2:
+      chunk = sock.recv(4096)
+      assert chunk, "conexão fechada antes da segunda resposta"
+      data += chunk
+
+  assert data.count(b"HTTP/1.1 200 OK") == 2
+
+@pytest.mark.perf
+def test_concurrent_clients_throughput(running_server):
+  """
+  Testa se o servidor atende clientes simultâneos sem serializar as requisições:
+  PERF_CLIENTS conexões keep-alive em paralelo, todas com 200 e vazão mínima.
+  """
+  per_client = PERF_REQUESTS // PERF_CLIENTS
+
+  def client(_):
+    conn = http.client.HTTPConnection("127.0.0.1", config.PORT, timeout=5)
+    statuses = []
+    try:
+      for _ in range(per_client):
+        conn.request("GET", "/index.html")
+        response = conn.getresponse()
+        response.read()
+        statuses.append(response.status)
+    finally:
+      conn.close()
+    return statuses
+
+  with ThreadPoolExecutor(max_workers=PERF_CLIENTS) as executor:
+    start = time.perf_counter()
+    results = list(executor.map(client, range(PERF_CLIENTS)))
+    elapsed = time.perf_counter() - start
+
+  statuses = [status for client_statuses in results for status in client_statuses]
+  assert statuses == [200] * (per_client * PERF_CLIENTS)
+  assert len(statuses) / elapsed > PERF_MIN_REQUESTS_PER_SECOND
+
+def test_saturated_server_returns_503(tmp_path, monkeypatch, submitted_connections):
+  """
+  Testa se, com o pool ocupado e a fila cheia, novas conexões recebem 503.
+  """
+  (tmp_path / "index.html").write_text(TEST_FILE_CONTENT)
+  monkeypatch.setattr(config, "WWW_ROOT", str(tmp_path))
+  monkeypatch.setattr(config, "MAX_WORKERS", 1)
+  monkeypatch.setattr(config, "MAX_QUEUED_CONNECTIONS", 1)
+  monkeypatch.setattr(config, "KEEP_ALIVE_TIMEOUT", 1)
+
+  port = config.PORT + 2
+  listen_socket = start_server_thread(start_server, port)
+  try:
+    # 1ª conexão ocupa o único worker (keep-alive); a 2ª espera na fila
+    busy = open_client(port)
+    busy.sendall(b"GET /index.html HTTP/1.1\r\n\r\n")
+    assert busy.recv(4096).startswith(b"HTTP/1.1 200 OK")
+    queued = open_client(port)
+    # Espera o servidor entregar as duas conexões ao pool (as duas vagas ocupadas)
+    assert submitted_connections.wait()  # busy
+    assert submitted_connections.wait()  # queued
+
+    # A 3ª encontra a fila cheia
+    response = requests.get(f"http://127.0.0.1:{port}/index.html")
+    assert response.status_code == 503
+
+    busy.close()
+    queued.close()
+  finally:
+    # Encerra o servidor: o worker e a porta não ficam presos pelo resto da sessão
+    listen_socket.shutdown(socket.SHUT_RDWR)
+
+def test_shutdown_closes_queued_connections(tmp_path, monkeypatch, submitted_connections):
+  """
+  Testa se, ao encerrar o servidor, as conexões que esperavam um worker são
+  fechadas (e não ficam abertas com o job cancelado).
+  """
+  (tmp_path / "index.html").write_text(TEST_FILE_CONTENT)
+  monkeypatch.setattr(config, "WWW_ROOT", str(tmp_path))
+  monkeypatch.setattr(config, "MAX_WORKERS", 1)
+  monkeypatch.setattr(config, "KEEP_ALIVE_TIMEOUT", 5)
+
+  port = config.PORT + 3
+  listen_socket = start_server_thread(start_server, port)
+
+  # 1ª conexão ocupa o único worker (keep-alive); a 2ª fica na fila do pool
+  busy = open_client(port)
+  busy.sendall(b"GET /index.html HTTP/1.1\r\n\r\n")
+  assert busy.recv(4096).startswith(b"HTTP/1.1 200 OK")
+  queued = open_client(port)
+  assert submitted_connections.wait()  # busy
+  assert submitted_connections.wait()  # queued
+
+  # Encerra o loop de accept: o job da conexão na fila é cancelado e o socket, fechado
+  listen_socket.shutdown(socket.SHUT_RDWR)
+  assert queued.recv(4096) == b""
+
+  busy.close()
+  queued.close()
+
+@pytest.fixture
+def running_async_server(tmp_path, monkeypatch, async_server):
+  """
+  Fixture que prepara a pasta web de um teste e devolve a URL do servidor asyncio
+  (iniciado uma vez por sessão em conftest.py, em outra porta).
+  """
+  test_www_dir = tmp_path / "www"
+  test_www_dir.mkdir()
+  (test_www_dir / "index.html").write_text(TEST_FILE_CONTENT)
+  monkeypatch.setattr(config, "WWW_ROOT", str(test_www_dir))
+
+  yield async_server
+
+def test_async_server_get_and_conditional_get(running_async_server):
+  """
+  Testa o servidor asyncio: 200 com keep-alive, 304 com ETag e 404 para arquivo inexistente.
+  """
+  with requests.Session() as session:
+    response1 = session.get(f"{running_async_server}/index.html")
+    assert response1.status_code == 200
+    assert response1.text == TEST_FILE_CONTENT
+
+    # Mesma conexão (keep-alive) para a requisição condicional
+    response2 = session.get(
+      f"{running_async_server}/index.html", headers={"If-None-Match": response1.headers["ETag"]}, stream=True
+    )
+    assert_not_modified(response2)
+
+  response3 = requests.get(f"{running_async_server}/nao_existe.html")
+  assert response3.status_code == 404
+
+async def probe(port, if_none_match):
+  """
+  Faz um GET cru por asyncio (uma conexão por sonda) e retorna (status, corpo).
+  """
+  reader, writer = await asyncio.open_connection("127.0.0.1", port)
+  try:
+    request = "GET /index.html HTTP/1.1\r\nHost: localhost\r\n"
+    if if_none_match is not None:
+      request += f"If-None-Match: {if_none_match}\r\n"
+    writer.write(request.encode() + b"\r\n")
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    length = 0
+    for line in head.split(b"\r\n"):
+      if line.lower().startswith(b"content-length:"):
+        length = int(line.split(b":", 1)[1])
+    return status, await reader.readexactly(length)
+  finally:
+    writer.close()
+    await writer.wait_closed()
+
+def test_async_server_conditional_matrix(running_async_server):
+  """
+  Testa as formas de If-None-Match no servidor asyncio, com todas as sondas em paralelo.
+  """
+  port = int(running_async_server.rsplit(":", 1)[1])
+  etag = requests.get(f"{running_async_server}/index.html").headers["ETag"]
+  values = [None if t is None else format_if_none_match(t, etag) for t, _ in CONDITIONAL_CASES]
+
+  async def run_probes():
+    return await asyncio.gather(*(probe(port, value) for value in values))
+
+  results = asyncio.run(run_probes())
+  for (template, expected_status), (status, body) in zip(CONDITIONAL_CASES, results):
+    assert status == expected_status, template
+    assert body == (b"" if expected_status == 304 else TEST_FILE_CONTENT.encode())
+
+def test_async_server_range_request(running_async_server):
+  """
+  Testa se o servidor asyncio responde 206 com o intervalo pedido e 416 com Content-Range.
+  """
+  content = os.urandom(100_000)
+  with open(os.path.join(config.WWW_ROOT, "big.bin"), "wb") as f:
+    f.write(content)
+
+  response = requests.get(f"{running_async_server}/big.bin", headers={"Range": "bytes=-250"})
+  assert response.status_code == 206
+  assert response.headers["Content-Range"] == "bytes 99750-99999/100000"
+  assert response.content == content[-250:]
+
+  unsatisfiable = requests.get(f"{running_async_server}/big.bin", headers={"Range": "bytes=200000-"})
+  assert unsatisfiable.status_code == 416
+  assert unsatisfiable.headers["Content-Range"] == "bytes */100000"
+
+def test_async_server_streams_large_file(running_async_server):
+  """
+  Testa se o servidor asyncio envia completo um arquivo acima do limiar de streaming.
+  """
+  content = os.urandom(config.STREAMING_THRESHOLD_BYTES + 12345)
+  with open(os.path.join(config.WWW_ROOT, "grande.bin"), "wb") as f:
+    f.write(content)
+
+  response = requests.get(f"{running_async_server}/grande.bin")
+  assert response.status_code == 200
+  assert response.headers["X-Cache-Status"] == "STREAMING"
+  assert response.content == content
\ No newline at end of file
@@ -4,26 +4,31 @@ import pytest
 import os
 import csv
 import threading
+import time
+from app import metrics
 from app.metrics import MetricsLogger
 
 TEST_CSV_FILE = "test_metrics/requests_test.csv"
 
+def remove_test_csv():
+  """Remove o CSV de teste, se existir: um unlink só, sem o stat de os.path.exists antes."""
+  try:
+    os.remove(TEST_CSV_FILE)
+  except FileNotFoundError:
+    pass
+
 @pytest.fixture
 def metrics_logger():
   """Fornece uma instância limpa do logger e limpa o arquivo após o teste."""
-  # Garante que o diretório existe
-  os.makedirs(os.path.dirname(TEST_CSV_FILE), exist_ok=True)
-  
-  # Limpa o arquivo antes do teste
-  if os.path.exists(TEST_CSV_FILE):
-    os.remove(TEST_CSV_FILE)
+  # Limpa o arquivo antes do teste. O diretório é criado pelo próprio MetricsLogger
+  remove_test_csv()
 
   logger = MetricsLogger(TEST_CSV_FILE)
   yield logger
+  logger.close()
 
   # Limpa o arquivo após o teste
-  if os.path.exists(TEST_CSV_FILE):
-    os.remove(TEST_CSV_FILE)
+  remove_test_csv()
 
 def test_csv_creation_and_header(metrics_logger):
   """Verifica se o arquivo CSV é criado com o cabeçalho correto."""
@@ -44,12 +49,16 @@ def test_concurrent_logging(metrics_logger):
   logs_per_thread = 50
   total_logs = num_threads * logs_per_thread
 
+  # Caminhos montados uma vez, fora do laço das threads
+  paths = [f"/path/{i}" for i in range(logs_per_thread)]
+
   def worker(thread_id):
-    for i in range(logs_per_thread):
+    client_ip = f"192.168.1.{thread_id}"
+    for path in paths:
       metrics_logger.log_request(
-        client_ip=f"192.168.1.{thread_id}",
+        client_ip=client_ip,
         method="GET",
-        path=f"/path/{i}",
+        path=path,
         status=200,
         response_time_ms=10.5,
         bytes_sent=1024,
@@ -65,6 +74,9 @@ def test_concurrent_logging(metrics_logger):
   for thread in threads:
     thread.join()
 
+  # A gravação é assíncrona: espera a thread escritora esvaziar a fila
+  metrics_logger.flush()
+
   # Verifica a integridade do arquivo CSV
   with open(TEST_CSV_FILE, 'r') as f:
     reader = csv.reader(f)
@@ -78,4 +90,75 @@ def test_concurrent_logging(metrics_logger):
 
     # 2. Verifica se cada linha tem o número correto de colunas
     for i, row in enumerate(lines):
-      assert len(row) == 8, f"Linha {i+1} tem número incorreto: {row}."
\ No newline at end of file
+      assert len(row) == 8, f"Linha {i+1} tem número incorreto: {row}."
+
+def test_path_with_comma_is_escaped(metrics_logger):
+  """Verifica se caracteres especiais do caminho não quebram as colunas do CSV."""
+  metrics_logger.log_request(
+    client_ip="127.0.0.1",
+    method="GET",
+    path='/a,b"c.html',
+    status=404,
+    response_time_ms=1.234,
+    bytes_sent=0,
+    cache_status="N/A"
+  )
+  metrics_logger.flush()
+
+  with open(TEST_CSV_FILE, 'r') as f:
+    reader = csv.DictReader(f)
+    rows = list(reader)
+
+  assert len(rows) == 1
+  assert rows[0]['path'] == "/a%2Cb%22c.html"
+  assert rows[0]['response_time_ms'] == "1.23"
+  assert rows[0]['cache_status'] == "N/A"
+
+def test_invalid_record_does_not_stop_writer(metrics_logger, capsys):
+  """Verifica se um registro que não formata é descartado e a thread escritora continua."""
+  metrics_logger.log_request("127.0.0.1", "GET", "/ruim.html", 500, None, 0, "N/A")
+  metrics_logger.log_request("127.0.0.1", "GET", "/bom.html", 200, 2.5, 10, "HIT")
+  metrics_logger.flush()
+
+  with open(TEST_CSV_FILE, 'r') as f:
+    rows = list(csv.DictReader(f))
+
+  assert [row['path'] for row in rows] == ["/bom.html"]
+  assert "Registro de métrica inválido descartado" in capsys.readouterr().out
+
+def test_dropped_records_are_reported_by_writer(monkeypatch, capsys):
+  """Verifica se os descartes com a fila cheia são só contados e relatados uma vez pela thread escritora."""
+  remove_test_csv()
+  release = threading.Event()
+  format_row = metrics._format_row
+  def slow_format_row(record):
+    release.wait(timeout=5)
+    return format_row(record)
+  monkeypatch.setattr(metrics, "_format_row", slow_format_row)
+
+  logger = MetricsLogger(TEST_CSV_FILE, max_pending=1)
+  try:
+    # O primeiro registro prende a escritora; o segundo ocupa a fila e os demais são descartados
+    logger.log_request("127.0.0.1", "GET", "/0.html", 200, 1.0, 10, "HIT")
+    while logger._queue.qsize():
+      time.sleep(0.001)
+    for i in range(1, 5):
+      logger.log_request("127.0.0.1", "GET", f"/{i}.html", 200, 1.0, 10, "HIT")
+    assert capsys.readouterr().out == ""
+
+    release.set()
+    logger.flush()
+    assert capsys.readouterr().out == "ERRO: Fila de métricas cheia; 3 registro(s) descartado(s).\n"
+  finally:
+    release.set()
+    logger.close()
+    remove_test_csv()
+
+def test_iso_timestamp_matches_datetime():
+  """O timestamp com prefixo em cache deve ser igual ao isoformat() do datetime."""
+  from datetime import datetime, UTC
+  from app.metrics import _iso_timestamp
+
+  for ts in (1700000000.25, 1700000000.5, 1700000001.000001):
+    expected = datetime.fromtimestamp(ts, UTC).isoformat(timespec="microseconds")
+    assert _iso_timestamp(ts) == expected
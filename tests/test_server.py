@@ -2,7 +2,22 @@
 
 import pytest
 # Importa a função a ser testada do módulo do servidor
-from app.server import get_mime_type
+import asyncio
+import errno
+import gzip
+import os
+import socket
+import sys
+import time
+from app import config, server
+from app.server import (
+  get_mime_type, register_mime_types, sendmsg_all, resolve_path, parse_request, read_file_content,
+  lookup_hot_response, lookup_hot_not_modified, remember_hot_response, CachedFile, build_variant_headers,
+  encode_variants, choose_encoding, sendfile_all, file_etag, etag_matches, parse_byte_range,
+  RANGE_NOT_SATISFIABLE, format_http_date, date_header_line,
+  drain_zerocopy_completions, ClientHandler
+)
+from app.server_async import stream_file
 
 """
 Testes unitários para as funções utilitárias do servidor.
@@ -22,6 +37,8 @@ def test_get_mime_type():
     "photo.jpg": "image/jpeg",
     "image.JPEG": "image/jpeg",  # Testa insensibilidade a maiúsculas/minúsculas
     "document.txt": "text/plain",
+    "data.json": "application/json",
+    "icon.svg": "image/svg+xml",
     "archive.zip": "application/octet-stream", # Exemplo de tipo não mapeado
     "no_extension": "application/octet-stream" # Arquivo sem extensão
   }
@@ -30,6 +47,387 @@ def test_get_mime_type():
     assert get_mime_type(filename) == expected_mime, \
       f"Falha para '{filename}': esperado '{expected_mime}', obteve '{get_mime_type(filename)}'"
 
+def test_register_mime_types_from_www_root(tmp_path, monkeypatch):
+  """
+  Testa se extensões presentes no diretório servido e ausentes da tabela são
+  registradas na inicialização, sem alterar as já mapeadas.
+  """
+  monkeypatch.setattr(server, "_MIME_BY_EXT", dict(server._MIME_BY_EXT))
+  (tmp_path / "sub").mkdir()
+  (tmp_path / "sub" / "photo.WEBP").write_bytes(b"x")
+  (tmp_path / "index.html").write_bytes(b"x")
+  (tmp_path / "data.unknownext").write_bytes(b"x")
+
+  assert get_mime_type("/photo.webp") == "application/octet-stream"
+  try:
+    register_mime_types(str(tmp_path))
+    assert get_mime_type("/photo.webp") == "image/webp"
+    assert get_mime_type("/index.html") == "text/html"
+    assert get_mime_type("/data.unknownext") == "application/octet-stream"
+  finally:
+    get_mime_type.cache_clear()
+
+def test_sendmsg_all_handles_partial_sends():
+  """
+  Testa se sendmsg_all reenvia o restante quando o kernel aceita só parte dos buffers.
+  """
+  class PartialSocket:
+    def __init__(self):
+      self.received = b""
+
+    def sendmsg(self, buffers, ancdata=(), flags=0):
+      # Aceita no máximo 3 bytes por chamada
+      data = b"".join(bytes(b) for b in buffers)[:3]
+      self.received += data
+      return len(data)
+
+  sock = PartialSocket()
+  sendmsg_all(sock, (b"HEAD\r\n", b"", b"corpo"))
+  assert sock.received == b"HEAD\r\ncorpo"
+
+def test_sendmsg_all_without_sendmsg(monkeypatch):
+  """
+  Testa o envio sem sendmsg (Windows): resposta pequena em um único sendall,
+  resposta grande com cabeçalhos e corpo em dois.
+  """
+  from app import server
+  monkeypatch.setattr(server, "_HAS_SENDMSG", False)
+
+  class RecordingSocket:
+    def __init__(self):
+      self.calls = []
+
+    def sendall(self, data):
+      self.calls.append(bytes(data))
+
+  sock = RecordingSocket()
+  sendmsg_all(sock, (b"HEAD\r\n", b"\r\n", b"corpo"))
+  assert sock.calls == [b"HEAD\r\n\r\ncorpo"]
+
+  body = b"x" * 4096
+  sock = RecordingSocket()
+  sendmsg_all(sock, (b"HEAD\r\n", b"\r\n", body))
+  assert sock.calls == [b"HEAD\r\n\r\n", body]
+
+def test_resolve_path_blocks_traversal(tmp_path, monkeypatch):
+  """
+  Testa se resolve_path recusa '..' e mantém os demais caminhos dentro de WWW_ROOT.
+  """
+  monkeypatch.setattr(config, "WWW_ROOT", str(tmp_path))
+
+  assert resolve_path("/../etc/passwd") is None
+  assert resolve_path("/css/../../segredo.txt") is None
+  assert resolve_path("/css//./style.css") == os.path.join(str(tmp_path), "css", "style.css")
+
+def test_parse_request():
+  """
+  Testa se parse_request extrai método, caminho e cabeçalhos direto dos bytes.
+  """
+  head = b"GET /index.html HTTP/1.1\r\nHost: localhost\r\nIf-None-Match: abc\r\nlinha-sem-dois-pontos"
+  method, path, headers = parse_request(head)
+
+  assert (method, path) == ("GET", "/index.html")
+  assert headers == {"host": "localhost", "if-none-match": "abc"}
+  assert parse_request(b"lixo") == ("INVALID", "INVALID", {})
+
+  # bytearray (buffer do servidor com threads), nomes fora da tabela e caixa incomum
+  _, _, headers = parse_request(bytearray(b"GET / HTTP/1.1\r\nX-Custom :  valor \r\nACCEPT-ENCODING: gzip"))
+  assert headers == {"x-custom": "valor", "accept-encoding": "gzip"}
+
+  # Com `wanted`, só os cabeçalhos pedidos são decodificados e guardados
+  _, _, headers = parse_request(head, frozenset({"if-none-match"}))
+  assert headers == {"if-none-match": "abc"}
+
+def test_read_file_content_with_mmap(tmp_path, monkeypatch):
+  """
+  Testa se, com mmap habilitado, arquivos grandes viram uma memoryview do mapeamento
+  e arquivos pequenos continuam sendo lidos como bytes.
+  """
+  monkeypatch.setattr(config, "CACHE_MMAP_ENABLED", True)
+  big = tmp_path / "grande.bin"
+  big.write_bytes(os.urandom(config.MMAP_MIN_BYTES))
+  small = tmp_path / "pequeno.txt"
+  small.write_bytes(b"abc")
+
+  with open(big, "rb") as f:
+    content = read_file_content(f)
+  assert isinstance(content, memoryview)
+  assert content == big.read_bytes()
+
+  # O mapeamento segue o tamanho do stat, mesmo que o arquivo tenha crescido depois
+  size = config.MMAP_MIN_BYTES
+  with open(big, "ab") as f:
+    f.write(b"extra")
+  with open(big, "rb") as f:
+    content = read_file_content(f, size)
+  assert isinstance(content, memoryview)
+  assert content == big.read_bytes()[:size]
+
+  # Arquivo truncado depois do stat: o mmap falha e a leitura comum assume
+  big.write_bytes(b"")
+  with open(big, "rb") as f:
+    assert read_file_content(f, size) == b""
+
+  with open(small, "rb") as f:
+    assert read_file_content(f) == b"abc"
+
+def test_hot_response_lookup(monkeypatch):
+  """
+  Testa o caminho rápido: só HOT_PATHS são guardados, requisições condicionais
+  seguem o caminho normal e a entrada expira após HOT_REVALIDATE_SECONDS.
+  """
+  monkeypatch.setattr(config, "HOT_REVALIDATE_SECONDS", 0.2)
+  bodies = {"identity": b"<h1>oi</h1>"}
+  cached = CachedFile(
+    "etag1", bodies, build_variant_headers("/www/index.html", bodies, "HIT", "etag1", 0), b"ETag: etag1\r\n\r\n"
+  )
+  remember_hot_response("/index.html", cached)
+  remember_hot_response("/outro.html", cached)
+
+  hot = lookup_hot_response("/index.html", {})
+  header_tail, body = hot.select("")
+  assert body == b"<h1>oi</h1>"
+  assert b"X-Cache-Status: HIT" in header_tail
+  assert lookup_hot_response("/outro.html", {}) is None
+  assert lookup_hot_response("/index.html", {"if-none-match": "etag1"}) is None
+
+  # If-None-Match igual à ETag da entrada pronta: 304 sem passar pelo stat
+  assert lookup_hot_not_modified("/index.html", {"if-none-match": "etag1"}) == b"ETag: etag1\r\n\r\n"
+  assert lookup_hot_not_modified("/index.html", {"if-none-match": "outra"}) is None
+  assert lookup_hot_not_modified("/index.html", {}) is None
+
+  # Adianta o relógio monotônico do servidor em vez de dormir até a entrada expirar
+  now = server.monotonic()
+  monkeypatch.setattr(server, "monotonic", lambda: now + 0.3)
+  assert lookup_hot_response("/index.html", {}) is None
+  assert lookup_hot_not_modified("/index.html", {"if-none-match": "etag1"}) is None
+
+def test_text_files_get_compressed_variants():
+  """
+  Testa se arquivos de texto ganham variante gzip e se a escolha segue o Accept-Encoding.
+  """
+  content = b"<p>texto repetido</p>" * 200
+  bodies = encode_variants("/www/index.html", content)
+  assert gzip.decompress(bodies["gzip"]) == content
+  assert encode_variants("/www/foto.png", content) == {"identity": content}
+  assert "gzip" in encode_variants("/www/dados.json", content)
+
+  assert choose_encoding("gzip, deflate", bodies) == "gzip"
+  assert choose_encoding("gzip;q=0, deflate", bodies) == "identity"
+  # Só identity e gzip, como sem o pacote brotli: o "*" não pode cair no br
+  gzip_only = {encoding: bodies[encoding] for encoding in ("identity", "gzip")}
+  assert choose_encoding("gzip;level=1;q=0", gzip_only) == "identity"  # q depois de outro parâmetro
+  assert choose_encoding("gzip;q=0, *", gzip_only) == "identity"        # a recusa vale mais que o "*"
+  assert choose_encoding("*", gzip_only) == "gzip"
+  assert choose_encoding("", bodies) == "identity"
+
+def test_sendfile_all_falls_back_to_chunks(tmp_path, monkeypatch):
+  """
+  Testa se sendfile_all envia o arquivo em blocos quando o os.sendfile não é suportado.
+  """
+  def unsupported(*args):
+    raise OSError(errno.EINVAL, "Invalid argument")
+  monkeypatch.setattr(os, "sendfile", unsupported)
+
+  content = os.urandom(3 * config.CHUNK_SIZE_BYTES + 5)
+  source = tmp_path / "arquivo.bin"
+  source.write_bytes(content)
+
+  left, right = socket.socketpair()
+  with left, right, open(source, "rb") as f:
+    right.settimeout(2)
+    assert sendfile_all(left, f, len(content)) == len(content)
+    received = b""
+    while len(received) < len(content):
+      received += right.recv(65536)
+  assert received == content
+
+class _LoopWithoutSendfile(asyncio.SelectorEventLoop):
+  """Loop que, como o do uvloop, herda o loop.sendfile de AbstractEventLoop."""
+  sendfile = asyncio.AbstractEventLoop.sendfile
+
+def test_stream_file_without_loop_sendfile(tmp_path):
+  """
+  Testa se stream_file envia o intervalo em blocos quando o loop não implementa sendfile.
+  """
+  content = os.urandom(3 * config.CHUNK_SIZE_BYTES + 5)
+  source = tmp_path / "arquivo.bin"
+  source.write_bytes(content)
+  start, end = 100, len(content) - 2
+
+  async def send_and_receive():
+    # Par TCP no loopback: stream_file liga TCP_CORK, que um socketpair não suporta
+    with socket.create_server(("127.0.0.1", 0)) as listener:
+      right = socket.create_connection(listener.getsockname())
+      left, _ = listener.accept()
+    reader, reader_side = await asyncio.open_connection(sock=right)
+    _, writer = await asyncio.open_connection(sock=left)
+    file_stat = source.stat()
+    await stream_file(writer, str(source), len(content), file_etag(str(source), file_stat),
+                      file_stat.st_mtime, byte_range=(start, end))
+    writer.close()
+    response = await reader.read()
+    reader_side.close()
+    return response
+
+  loop = _LoopWithoutSendfile()
+  try:
+    response = loop.run_until_complete(send_and_receive())
+  finally:
+    loop.close()
+  headers, body = response.split(b"\r\n\r\n", 1)
+  assert headers.startswith(b"HTTP/1.1 206")
+  assert f"Content-Range: bytes {start}-{end}/{len(content)}".encode() in headers
+  assert body == content[start:end + 1]
+
+def test_file_etag_changes_with_file_version(tmp_path):
+  """
+  Testa se a ETag memorizada é reaproveitada e muda quando o arquivo muda.
+  """
+  target = tmp_path / "pagina.html"
+  target.write_text("versao 1")
+  filepath = str(target)
+
+  first = file_etag(filepath, os.stat(filepath))
+  assert file_etag(filepath, os.stat(filepath)) == first
+
+  target.write_text("versao 2, maior")
+  os.utime(filepath, ns=(0, os.stat(filepath).st_mtime_ns + 1_000_000))
+  assert file_etag(filepath, os.stat(filepath)) != first
+
+def test_etag_method_hash(tmp_path, monkeypatch):
+  """
+  Testa se ETAG_METHOD="hash" troca o formato da ETag, inclusive para um arquivo já memorizado.
+  """
+  target = tmp_path / "pagina.html"
+  target.write_text("conteudo")
+  filepath = str(target)
+  st = os.stat(filepath)
+
+  simple = file_etag(filepath, st)
+  assert simple == f'W/"{st.st_size:x}-{st.st_mtime_ns:x}"'
+
+  monkeypatch.setattr(config, "ETAG_METHOD", "hash")
+  hashed = file_etag(filepath, st)
+  assert hashed.startswith('W/"') and len(hashed) == len('W/""') + 20
+
+def test_etag_matches_weak_comparison():
+  """
+  Testa a comparação fraca do If-None-Match: igualdade, forma forte, "*" e listas.
+  """
+  etag = 'W/"1a-2b"'
+  assert etag_matches('W/"1a-2b"', etag)
+  assert etag_matches('"1a-2b"', etag)
+  assert etag_matches(' * ', etag)
+  assert etag_matches('"outra", W/"1a-2b"', etag)
+  assert not etag_matches('"outra"', etag)
+  assert not etag_matches('W/"1a-2"', etag)
+
+def test_parse_byte_range(monkeypatch):
+  """
+  Testa a interpretação do Range e do If-Range: intervalos válidos, ignorados e não satisfazíveis.
+  """
+  etag, mtime, size = 'W/"1a-2b"', 1_700_000_000, 1000
+
+  def parse(range_header, **extra):
+    return parse_byte_range({"range": range_header, **extra}, etag, mtime, size)
+
+  assert parse_byte_range({}, etag, mtime, size) is None
+  assert parse("bytes=0-249") == (0, 249)
+  assert parse("bytes=900-") == (900, 999)
+  assert parse("bytes=-100") == (900, 999)
+  assert parse("bytes=500-5000") == (500, 999)   # Fim além do arquivo é truncado
+  assert parse("bytes=1000-") == RANGE_NOT_SATISFIABLE
+  assert parse("bytes=-0") == RANGE_NOT_SATISFIABLE
+  # Ignorados: vários intervalos, outra unidade, fim antes do início, malformado
+  for header in ("bytes=0-1,5-6", "items=0-1", "bytes=5-3", "bytes=-", "bytes=a-b", "bytes=+1-2"):
+    assert parse(header) is None
+
+  # If-Range exige comparação forte: a ETag fraca do servidor nunca satisfaz
+  assert parse("bytes=0-9", **{"if-range": etag}) is None
+  assert parse("bytes=0-9", **{"if-range": '"1a-2b"'}) is None
+  assert parse("bytes=0-9", **{"if-range": '"outra"'}) is None
+  assert parse_byte_range({"range": "bytes=0-9", "if-range": '"1a-2b"'}, '"1a-2b"', mtime, size) == (0, 9)
+  assert parse_byte_range({"range": "bytes=0-9", "if-range": 'W/"1a-2b"'}, '"1a-2b"', mtime, size) is None
+
+  # Data: vale só se o Last-Modified é pelo menos 1 segundo mais antigo que o Date
+  assert parse("bytes=0-9", **{"if-range": format_http_date(mtime)}) == (0, 9)
+  monkeypatch.setattr(server, "time", lambda: mtime + 0.5)
+  assert parse("bytes=0-9", **{"if-range": format_http_date(mtime)}) is None
+
+def test_date_header_line_is_cached_per_second(monkeypatch):
+  """
+  Testa se a linha Date é reutilizada dentro do mesmo segundo e trocada no seguinte.
+  """
+  from app import server
+  now = [784111777.2]
+  monkeypatch.setattr(server, "time", lambda: now[0])
+
+  line = date_header_line()
+  assert line == b"Date: Sun, 06 Nov 1994 08:49:37 GMT\r\n"
+  now[0] = 784111777.9
+  assert date_header_line() is line
+
+  now[0] = 784111778.0
+  assert date_header_line() == b"Date: Sun, 06 Nov 1994 08:49:38 GMT\r\n"
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="MSG_ZEROCOPY só existe no Linux")
+def test_zerocopy_on_loopback_reports_copy():
+  """
+  Testa se a drenagem da fila de erros detecta que o kernel copiou um envio
+  MSG_ZEROCOPY (no loopback os dados são sempre copiados).
+  """
+  from app import server
+  listener = socket.create_server(("127.0.0.1", 0))
+  with listener, socket.create_connection(listener.getsockname(), timeout=2) as client:
+    peer, _ = listener.accept()
+    with peer:
+      try:
+        client.setsockopt(socket.SOL_SOCKET, server._SO_ZEROCOPY, 1)
+      except OSError:
+        pytest.skip("SO_ZEROCOPY não suportado por este kernel")
+      payload = b"x" * 65536
+      server.sendmsg_all(client, (payload,), server._MSG_ZEROCOPY)
+      received = 0
+      while received < len(payload):
+        received += len(peer.recv(65536))
+
+      # Como no servidor, a fila de erros é lida por uma cópia do descritor sem timeout.
+      # A notificação chega depois do ACK; espera um pouco por ela
+      with socket.socket(fileno=os.dup(client.fileno())) as errqueue:
+        deadline = time.time() + 1
+        copied = False
+        while not copied and time.time() < deadline:
+          copied = drain_zerocopy_completions(errqueue)
+          time.sleep(0.01)
+      assert copied
+
+def test_cache_hit_does_a_single_stat(tmp_path, monkeypatch):
+  """
+  Testa se uma requisição servida do cache faz um único os.stat (validação pela ETag).
+  """
+  (tmp_path / "pagina.html").write_text("<p>oi</p>")
+  monkeypatch.setattr(config, "WWW_ROOT", str(tmp_path))
+  request = b"GET /pagina.html HTTP/1.1\r\nHost: localhost"
+
+  left, right = socket.socketpair()
+  with left, right:
+    right.settimeout(2)
+    handler = ClientHandler(left, ("127.0.0.1", 0))
+    handler.process_request(request, time.time())  # MISS: preenche o cache
+    right.recv(65536)
+
+    calls = []
+    real_stat = os.stat
+    def counting_stat(*args, **kwargs):
+      calls.append(args)
+      return real_stat(*args, **kwargs)
+    monkeypatch.setattr(os, "stat", counting_stat)
+
+    handler.process_request(request, time.time())
+    assert b"X-Cache-Status: HIT" in right.recv(65536)
+  assert len(calls) == 1
+
 def test_placeholder():
   """
   Placeholder para garantir que o pytest está configurado corretamente.